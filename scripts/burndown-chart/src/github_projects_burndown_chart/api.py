@@ -0,0 +1,313 @@
+"""
+Python API for generating burndown charts from a long-running process.
+
+Every function takes the project's settings as an explicit `ProjectConfig`,
+keeps no global state, and raises `errors.BurndownError` subclasses instead
+of exiting, so that one process can serve many projects concurrently:
+
+    config = Config()
+    png = generate(config.project("user", "my_project"), "Sprint 5", output="png")
+
+Passing `as_of` draws a chart as it would have looked at a past instant.
+"""
+import dataclasses
+from datetime import datetime, timezone
+from io import StringIO
+import logging
+from typing import List, Optional, Tuple, Union
+
+from chart.data import BurndownChartData, BurndownChartDataSeries
+from chart.export import EXPORT_FORMATS, write_data
+from config import ProjectConfig
+from errors import ConfigError
+from gh.api_wrapper import (
+    get_organization_project,
+    get_repository_project,
+    get_project_v2,
+    get_projects_v2,
+    get_sprint_dates,
+    sprint_prefetch,
+)
+from gh.project import Project
+from util import colors
+from util.calculators import BurndownCalculator, get_calculator
+from util.dates import date_range, end_of_day
+from util.portfolio import PortfolioStats
+from util.stats import ProjectStats
+
+logger = logging.getLogger(__name__)
+
+# `generate` returns the chart data itself, a PNG, or one of the data exports
+OUTPUTS = ["data", "png"] + EXPORT_FORMATS
+
+# Charted from here to today when the requested sprint is not found
+DEFAULT_SPRINT_START = "2026-01-12"
+
+
+def download_project_data(
+    project_config: ProjectConfig, sprint: str, use_cache: bool = True
+) -> Project:
+    if project_config["settings"].get("version", 2) == 2:
+        return get_project_v2(project_config, sprint, use_cache)
+
+    if project_config.project_type == "repository":
+        return get_repository_project(project_config, use_cache)
+    elif project_config.project_type == "organization":
+        return get_organization_project(project_config, use_cache)
+    else:
+        raise ConfigError(f"Unknown project type: {project_config.project_type}")
+
+
+def project_stats(
+    project_config: ProjectConfig,
+    sprint: Optional[str] = None,
+    use_cache: bool = True,
+    as_of: Optional[datetime] = None,
+) -> Tuple[ProjectStats, ProjectConfig]:
+    """
+    Fetches the project and the dates of `sprint`. Returns the project's
+    stats as of `as_of` (by default, now), and a copy of `project_config`
+    with the sprint dates filled in.
+    """
+    project = download_project_data(project_config, sprint, use_cache)
+
+    # Fetched after the project so the iterations lookup can share its
+    # first GraphQL round-trip.
+    start, end = get_sprint_dates(project_config, sprint)
+    if not (start and end):
+        start = DEFAULT_SPRINT_START
+        end = (
+            (as_of or datetime.now(timezone.utc))
+            .replace(hour=0, minute=0, second=0, microsecond=0)
+            .strftime("%Y-%m-%d")
+        )
+    project_config = project_config.with_sprint_dates(start, end)
+
+    stats = ProjectStats(
+        project,
+        project_config.utc_sprint_start(),
+        project_config.utc_chart_end() or project_config.utc_sprint_end(),
+        as_of,
+    )
+    return stats, project_config
+
+
+def prepare_chart_data(
+    stats: ProjectStats, project_config: ProjectConfig, group_by: str = None
+) -> BurndownChartData:
+    color_gen = colors()
+    series_list = []
+
+    settings = project_config["settings"]
+    calc_types = settings.get("calculators", ["burndown"])
+    custom_calculators = settings.get("custom_calculators")
+    for pts_type in calc_types:
+        calculator = get_calculator(pts_type, stats.project.cards, custom_calculators)
+        if not calculator:
+            logger.warning(f"Unknown calculator type '{pts_type}'. Skipping.")
+            continue
+
+        # Logic: If using the 'BurndownCalculator', it returns the exact remaining value.
+        # For others (like 'closed'), we assume the user wants (Total - Closed).
+        if isinstance(calculator, BurndownCalculator):
+            points_data = stats.remaining_points_by_date()
+        else:
+            # legacy behavior: Subtract calculated value from Total
+            # cumulative_data = stats.points_by_date(calculator)
+            # points_data = {
+            #     d: stats.total_points - val for d, val in cumulative_data.items()
+            # }
+            points_data = stats.points_by_date(calculator)
+
+        series_list.append(
+            BurndownChartDataSeries(
+                name=pts_type.capitalize(),
+                data=points_data,
+                format=dict(color=next(color_gen)),
+            )
+        )
+
+    if group_by:
+        for group, group_series in stats.points_by_group(group_by).items():
+            series_list.append(
+                BurndownChartDataSeries(
+                    name=f"{group_by.capitalize()}: {group}",
+                    data=group_series.remaining,
+                    format=dict(color=next(color_gen)),
+                )
+            )
+
+    # construct the Data Object
+    points_label = settings.get("points_label", "Points")
+    if not points_label:
+        points_label = "Issues"
+
+    data = BurndownChartData(
+        sprint_name=stats.project.name,
+        utc_chart_start=project_config.utc_sprint_start(),
+        utc_chart_end=project_config.utc_chart_end() or project_config.utc_sprint_end(),
+        utc_sprint_start=project_config.utc_sprint_start(),
+        utc_sprint_end=project_config.utc_sprint_end(),
+        total_points=stats.total_points,
+        series=series_list,
+        points_label=f"Outstanding {points_label}",
+        data_as_of=stats.project.data_as_of,
+        as_of=stats.as_of,
+    )
+    return data
+
+
+def prepare_portfolio_data(
+    project_configs: List[ProjectConfig],
+    sprint: str,
+    use_cache: bool = True,
+    as_of: Optional[datetime] = None,
+    group_by: Optional[str] = None,
+) -> Tuple[BurndownChartData, PortfolioStats]:
+    """
+    Fetches several projects and charts their combined burndown. With a
+    `sprint`, each project's dates are those of its iteration of that name,
+    falling back to the sprint dates in its config.
+    """
+    # The iterations ride along with the first page of the projects
+    prefetch = (
+        [request for c in project_configs for request in sprint_prefetch(c)]
+        if sprint
+        else []
+    )
+    projects = get_projects_v2(
+        [(project_config, sprint) for project_config in project_configs], use_cache, prefetch
+    )
+    if sprint:
+        resolved = []
+        for project_config in project_configs:
+            start, end = get_sprint_dates(project_config, sprint)
+            resolved.append(
+                project_config.with_sprint_dates(start, end) if start and end else project_config
+            )
+        project_configs = resolved
+
+    for project_config in project_configs:
+        if not project_config.utc_sprint_start() or not project_config.utc_sprint_end():
+            raise ConfigError(
+                f"{project_config.project_type}/{project_config.project_name} "
+                "has no sprint start and end dates."
+            )
+    starts = [project_config.utc_sprint_start() for project_config in project_configs]
+    ends = [project_config.utc_sprint_end() for project_config in project_configs]
+    stats = PortfolioStats(projects, min(starts), max(ends), as_of)
+
+    color_gen = colors()
+    series_list = [
+        BurndownChartDataSeries(
+            name="Portfolio",
+            data=stats.remaining_points_by_date(),
+            format=dict(color=next(color_gen), linewidth=2),
+        )
+    ]
+    for project_config, stacked in zip(
+        project_configs, stats.stacked_remaining_points_by_date()
+    ):
+        series_list.append(
+            BurndownChartDataSeries(
+                name=project_config.project_name,
+                data=stacked,
+                format=dict(color=next(color_gen), alpha=0.6),
+            )
+        )
+    if group_by:
+        for group, group_series in stats.points_by_group(group_by).items():
+            series_list.append(
+                BurndownChartDataSeries(
+                    name=f"{group_by.capitalize()}: {group}",
+                    data=group_series.remaining,
+                    format=dict(color=next(color_gen)),
+                )
+            )
+
+    # The first project's settings (e.g. points_label) apply to the whole chart
+    points_label = project_configs[0]["settings"].get("points_label", "Points") or "Issues"
+    data_as_of = [project.data_as_of for project in projects if project.data_as_of]
+    data = BurndownChartData(
+        sprint_name="Portfolio",
+        utc_chart_start=stats.start_date,
+        utc_chart_end=stats.end_date,
+        utc_sprint_start=stats.start_date,
+        utc_sprint_end=stats.end_date,
+        total_points=stats.total_points,
+        series=series_list,
+        points_label=f"Outstanding {points_label}",
+        data_as_of=min(data_as_of, default=None),
+        as_of=as_of,
+    )
+    return data, stats
+
+
+def render_png(data: BurndownChartData) -> bytes:
+    # The charting stack is only imported when a chart is rendered
+    from chart.burndown import BurndownChart
+
+    return BurndownChart(data).png()
+
+
+def generate(
+    project_config: ProjectConfig,
+    sprint: Optional[str] = None,
+    output: str = "data",
+    group_by: Optional[str] = None,
+    use_cache: bool = True,
+    as_of: Optional[datetime] = None,
+) -> Union[BurndownChartData, bytes]:
+    """
+    Generates the burndown chart of one project. Returns the chart data for
+    `output="data"`, the rendered chart for `"png"`, or the chart data
+    encoded as `"json"`, `"csv"` or `"ndjson"`.
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output '{output}'. Expected one of {OUTPUTS}.")
+
+    stats, project_config = project_stats(project_config, sprint, use_cache, as_of)
+    data = prepare_chart_data(stats, project_config, group_by)
+    if output == "data":
+        return data
+    if output == "png":
+        return render_png(data)
+
+    stream = StringIO()
+    write_data(data, stats.project.cards, output, stream)
+    return stream.getvalue().encode("utf-8")
+
+
+def time_lapse(
+    project_config: ProjectConfig,
+    sprint: Optional[str] = None,
+    group_by: Optional[str] = None,
+    use_cache: bool = True,
+) -> List[BurndownChartData]:
+    """
+    The chart of every day of the sprint up to today, as it looked at the end
+    of that day. The project is fetched once and its series are computed
+    once, as of now: a day's value does not depend on later events, so each
+    frame is those series cut off after its day. The frames' total points
+    come from a single lookup of all their instants in the card index.
+    """
+    stats, project_config = project_stats(project_config, sprint, use_cache)
+    now = datetime.now(timezone.utc)
+    chart = prepare_chart_data(stats.at(now), project_config, group_by)
+
+    dates = date_range(stats.start_date, min(stats.end_date, now))
+    snapshots = stats.intervals.snapshots([min(end_of_day(date), now) for date in dates])
+    frames = []
+    for date, snapshot in zip(dates, snapshots):
+        series = [
+            dataclasses.replace(
+                series, data={d: v if d <= date else None for d, v in series.data.items()}
+            )
+            for series in chart.series
+        ]
+        frames.append(
+            dataclasses.replace(
+                chart, series=series, total_points=snapshot.scope_points, as_of=snapshot.as_of
+            )
+        )
+    return frames
@@ -1,36 +1,21 @@
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any, Dict, Iterable
-import matplotlib.pyplot as plt
+from io import BytesIO
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+import numpy as np
 import os
 
+from chart.data import (
+    BurndownChartData,
+    BurndownChartDataSeries,
+    default_ideal_trendline_format,
+)
 from util.dates import parse_to_local, date_range
+from util.downsample import lttb
+from util.fingerprint import is_unchanged, save_fingerprint
 
-
-@dataclass
-class BurndownChartDataSeries:
-    name: str
-    data: Iterable[Dict[datetime, int]]
-    format: Dict[str, Any]
-
-
-def default_ideal_trendline_format() -> Dict[str, Any]:
-    return dict(color="grey", linestyle=(0, (5, 5)))
-
-
-@dataclass
-class BurndownChartData:
-    sprint_name: str
-    utc_chart_start: datetime
-    utc_chart_end: datetime
-    utc_sprint_start: datetime
-    utc_sprint_end: datetime
-    total_points: int
-    series: Iterable[BurndownChartDataSeries]
-    points_label: str = "Outstanding Points"
-    ideal_trendline_format: Dict[str, Any] = field(
-        default_factory=default_ideal_trendline_format
-    )
+# Rotated date labels fit comfortably at this density
+MAX_TICKS_PER_INCH = 4
 
 
 class BurndownChart:
@@ -38,49 +23,107 @@ class BurndownChart:
     def __init__(self, data: BurndownChartData):
         self.data: BurndownChartData = data
 
-    def __prepare_chart(self):
+    def __prepare_chart(self, figure: Figure):
+        # Draws through the figure's own axes rather than pyplot's global
+        # current figure, so charts can be rendered from several threads.
+        axes = figure.add_subplot()
+
         # Plot the data
         chart_dates = date_range(self.data.utc_chart_start, self.data.utc_chart_end)
+        date_index = {date: i for i, date in enumerate(chart_dates)}
+        # More points than pixels cannot be seen, only laid out
+        max_points = int(figure.get_figwidth() * figure.dpi)
         for series in self.data.series:
-            series_dates = [chart_dates.index(date) for date in series.data.keys()]
-            series_points = list(series.data.values())
-            plt.plot(series_dates, series_points, label=series.name, **series.format)
-        plt.legend()
+            plotted = [
+                (date_index[date], points)
+                for date, points in series.data.items()
+                if points is not None
+            ]
+            series_dates = np.array([x for x, _ in plotted], dtype=float)
+            series_points = np.array([y for _, y in plotted], dtype=float)
+            keep = lttb(series_dates, series_points, max_points)
+            axes.plot(
+                series_dates[keep], series_points[keep], label=series.name, **series.format
+            )
+        axes.legend()
 
         # Configure title and labels
-        plt.title(f"{self.data.sprint_name}: Burndown Chart")
-        plt.ylabel(self.data.points_label)
-        plt.xlabel("Date")
+        title = f"{self.data.sprint_name}: Burndown Chart"
+        if self.data.as_of:
+            title += f"\n(as of {self.data.as_of:%Y-%m-%d %H:%M} UTC)"
+        if self.data.data_as_of:
+            title += f"\n(data as of {self.data.data_as_of:%Y-%m-%d %H:%M} UTC)"
+        axes.set_title(title)
+        axes.set_ylabel(self.data.points_label)
+        axes.set_xlabel("Date")
 
         # Configure axes limits
-        plt.ylim(ymin=0, ymax=self.data.total_points * 1.1)
-        plt.xlim(
-            xmin=chart_dates.index(self.data.utc_chart_start),
-            xmax=chart_dates.index(self.data.utc_chart_end),
+        axes.set_ylim(ymin=0, ymax=self.data.total_points * 1.1)
+        axes.set_xlim(
+            xmin=date_index[self.data.utc_chart_start],
+            xmax=date_index[self.data.utc_chart_end],
         )
 
-        # Configure x-axis tick marks
+        # Configure x-axis tick marks: at most MAX_TICKS_PER_INCH rotated
+        # labels per inch of width, on whole days.
         date_labels = [str(parse_to_local(date))[:10] for date in chart_dates]
-        plt.xticks(range(len(chart_dates)), date_labels)
-        plt.xticks(rotation=90)
+        axes.xaxis.set_major_locator(
+            MaxNLocator(
+                nbins=max(1, int(figure.get_figwidth() * MAX_TICKS_PER_INCH)),
+                integer=True,
+            )
+        )
+        axes.xaxis.set_major_formatter(
+            FuncFormatter(
+                lambda x, _: date_labels[int(x)] if 0 <= int(x) < len(date_labels) else ""
+            )
+        )
+        axes.tick_params(axis="x", labelrotation=90)
 
         # Plot the ideal trendline
         sprint_days = (self.data.utc_sprint_end - self.data.utc_sprint_start).days
-        plt.axline(
-            (chart_dates.index(self.data.utc_sprint_start), self.data.total_points),
+        axes.axline(
+            (date_index[self.data.utc_sprint_start], self.data.total_points),
             slope=-(self.data.total_points / (sprint_days)),
             **self.data.ideal_trendline_format,
         )
-
-    def generate_chart(self, path):
-        self.__prepare_chart()
+        # Keep the rotated date labels inside the figure
+        figure.tight_layout()
+
+    def figure(self) -> Figure:
+        """The chart as a new figure on the Agg canvas, independent of pyplot."""
+        figure = Figure()
+        FigureCanvasAgg(figure)
+        self.__prepare_chart(figure)
+        return figure
+
+    def png(self) -> bytes:
+        """The chart rendered as PNG."""
+        buffer = BytesIO()
+        self.figure().savefig(buffer, format="png")
+        return buffer.getvalue()
+
+    def generate_chart(self, path, force: bool = False) -> bool:
+        """
+        Renders the chart to `path`. Returns False without rendering if `path`
+        already holds a chart of identical data, unless `force` is set.
+        """
+        fingerprint = self.data.fingerprint()
+        if not force and is_unchanged(path, fingerprint):
+            return False
+
+        figure = self.figure()
 
         # Ensure parent directories exist
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
-        plt.savefig(path)
-        plt.show()
+        figure.savefig(path)
+        save_fingerprint(path, fingerprint)
+        return True
 
     def render(self):
-        self.__prepare_chart()
+        # Only an interactive window needs pyplot
+        import matplotlib.pyplot as plt
+
+        self.__prepare_chart(plt.figure())
         plt.show()
@@ -0,0 +1,76 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+import hashlib
+import json
+from typing import Any, Dict, Iterable, Optional
+
+
+@dataclass
+class BurndownChartDataSeries:
+    name: str
+    data: Iterable[Dict[datetime, int]]
+    format: Dict[str, Any]
+
+
+def default_ideal_trendline_format() -> Dict[str, Any]:
+    return dict(color="grey", linestyle=(0, (5, 5)))
+
+
+@dataclass
+class BurndownChartData:
+    sprint_name: str
+    utc_chart_start: datetime
+    utc_chart_end: datetime
+    utc_sprint_start: datetime
+    utc_sprint_end: datetime
+    total_points: int
+    series: Iterable[BurndownChartDataSeries]
+    points_label: str = "Outstanding Points"
+    ideal_trendline_format: Dict[str, Any] = field(
+        default_factory=default_ideal_trendline_format
+    )
+    # Set when the chart was drawn from cached data of an earlier day
+    data_as_of: Optional[datetime] = None
+    # Set when the chart replays the project as it was at a past instant
+    as_of: Optional[datetime] = None
+
+    def ideal_trendline(self, dates: Iterable[datetime]) -> Dict[datetime, float]:
+        """
+        The ideal burndown drawn on the chart: a straight line from the total
+        points at the sprint start down to zero at the sprint end.
+        """
+        sprint_days = (self.utc_sprint_end - self.utc_sprint_start).days or 1
+        slope = self.total_points / sprint_days
+        return {
+            date: max(0.0, self.total_points - slope * (date - self.utc_sprint_start).days)
+            for date in dates
+        }
+
+    def fingerprint(self) -> str:
+        """
+        A hash of everything the chart shows: the dates, totals and the name
+        and values of each series. Equal fingerprints render equal charts.
+        """
+        content = {
+            "sprint_name": self.sprint_name,
+            "dates": [
+                str(d)
+                for d in (
+                    self.utc_chart_start,
+                    self.utc_chart_end,
+                    self.utc_sprint_start,
+                    self.utc_sprint_end,
+                )
+            ],
+            "total_points": self.total_points,
+            "points_label": self.points_label,
+            "series": [
+                [series.name, [[str(d), v] for d, v in series.data.items()]]
+                for series in self.series
+            ],
+        }
+        if self.data_as_of:
+            content["data_as_of"] = str(self.data_as_of)
+        if self.as_of:
+            content["as_of"] = str(self.as_of)
+        return hashlib.sha256(json.dumps(content).encode("utf-8")).hexdigest()
@@ -0,0 +1,135 @@
+import csv
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+
+from chart.data import BurndownChartData
+from gh.project import Card
+from util.dates import date_range
+
+EXPORT_FORMATS = ["json", "csv", "ndjson"]
+
+CSV_COLUMNS = [
+    "record",
+    "name",
+    "date",
+    "value",
+    "id",
+    "status",
+    "points",
+    "created",
+    "assigned",
+    "closed",
+]
+
+
+def _day(date: datetime) -> str:
+    return date.strftime("%Y-%m-%d")
+
+
+def _timestamp(date: Optional[datetime]) -> Optional[str]:
+    return date.isoformat() if date else None
+
+
+def chart_record(data: BurndownChartData) -> Dict[str, Any]:
+    return {
+        "record": "chart",
+        "sprint_name": data.sprint_name,
+        "points_label": data.points_label,
+        "chart_start": _day(data.utc_chart_start),
+        "chart_end": _day(data.utc_chart_end),
+        "sprint_start": _day(data.utc_sprint_start),
+        "sprint_end": _day(data.utc_sprint_end),
+        "total_points": data.total_points,
+        "data_as_of": _timestamp(data.data_as_of),
+        "as_of": _timestamp(data.as_of),
+    }
+
+
+def _until(date: Optional[datetime], as_of: Optional[datetime]) -> Optional[datetime]:
+    # Events after `as_of` had not happened yet
+    return date if date and (as_of is None or date <= as_of) else None
+
+
+def chart_cards(data: BurndownChartData, cards: Iterable[Card]) -> Iterator[Card]:
+    """The cards of the chart: with `as_of`, only those created by then."""
+    for card in cards:
+        if data.as_of is None or not card.created or card.created <= data.as_of:
+            yield card
+
+
+def card_record(card: Card, as_of: Optional[datetime] = None) -> Dict[str, Any]:
+    return {
+        "record": "card",
+        "id": card.id,
+        "name": card.title,
+        "status": card.status,
+        "points": card.points,
+        "created": _timestamp(card.created),
+        "assigned": _timestamp(_until(card.assigned, as_of)),
+        "closed": _timestamp(_until(card.closed, as_of)),
+    }
+
+
+def series_records(data: BurndownChartData) -> Iterator[Dict[str, Any]]:
+    for series in data.series:
+        for date, value in series.data.items():
+            yield {"record": "series", "name": series.name, "date": _day(date), "value": value}
+    ideal = data.ideal_trendline(date_range(data.utc_chart_start, data.utc_chart_end))
+    for date, value in ideal.items():
+        yield {"record": "ideal", "name": "Ideal", "date": _day(date), "value": value}
+
+
+def records(data: BurndownChartData, cards: Iterable[Card]) -> Iterator[Dict[str, Any]]:
+    """
+    Flattens the chart data into a stream of records: one `chart` record with
+    the totals, then one record per point of each `series` and of the `ideal`
+    line, then one per `card` (see `chart_cards`).
+    """
+    yield chart_record(data)
+    yield from series_records(data)
+    for card in chart_cards(data, cards):
+        yield card_record(card, data.as_of)
+
+
+def write_ndjson(data: BurndownChartData, cards: Iterable[Card], stream: TextIO):
+    for record in records(data, cards):
+        stream.write(json.dumps(record) + "\n")
+
+
+def write_csv(data: BurndownChartData, cards: Iterable[Card], stream: TextIO):
+    writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for record in records(data, cards):
+        if record["record"] == "chart":
+            writer.writerow(
+                {"record": "total", "name": "total_points", "value": data.total_points}
+            )
+        else:
+            writer.writerow(record)
+
+
+def write_json(data: BurndownChartData, cards: Iterable[Card], stream: TextIO):
+    document = chart_record(data)
+    del document["record"]
+    document["series"] = [
+        {
+            "name": series.name,
+            "data": [{"date": _day(d), "value": v} for d, v in series.data.items()],
+        }
+        for series in data.series
+    ]
+    ideal = data.ideal_trendline(date_range(data.utc_chart_start, data.utc_chart_end))
+    document["ideal"] = [{"date": _day(d), "value": v} for d, v in ideal.items()]
+    document["cards"] = []
+    for card in chart_cards(data, cards):
+        record = card_record(card, data.as_of)
+        del record["record"]
+        document["cards"].append(record)
+    json.dump(document, stream, indent=2)
+    stream.write("\n")
+
+
+def write_data(data: BurndownChartData, cards: Iterable[Card], format: str, stream: TextIO):
+    writers = {"json": write_json, "csv": write_csv, "ndjson": write_ndjson}
+    writers[format](data, cards, stream)
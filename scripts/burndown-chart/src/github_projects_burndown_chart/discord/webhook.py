@@ -1,13 +1,40 @@
 import requests
 
-from config import secrets
+from errors import WebhookError
+from util.fingerprint import read_fingerprint, save_fingerprint
 
-def post_burndown_chart(chart_path):
-    requests.post(
-        secrets['discord_webhook'],
+
+def post_burndown_chart(
+    chart_path, webhook_url: str, fingerprint: str = None, force: bool = False
+) -> bool:
+    """
+    Posts the chart to the Discord webhook at `webhook_url`. Returns False
+    without posting if a chart with the same data `fingerprint` was the last
+    one posted.
+    """
+    posted_key = f"{chart_path}.posted"
+    if fingerprint and not force and read_fingerprint(posted_key) == fingerprint:
+        return False
+
+    __check(requests.post(
+        webhook_url,
         json={'content': "Today's Burndown Chart"}
-    )
-    requests.post(
-        secrets['discord_webhook'],
-        files={'file': open(chart_path, 'rb')},
-    )
\ No newline at end of file
+    ))
+    with open(chart_path, 'rb') as chart:
+        __check(requests.post(
+            webhook_url,
+            files={'file': chart},
+        ))
+
+    # Only recorded once both posts went through, so a failed or rate
+    # limited post is retried on the next run
+    if fingerprint:
+        save_fingerprint(posted_key, fingerprint)
+    return True
+
+
+def __check(response: requests.Response):
+    if not response.ok:
+        raise WebhookError(
+            f"Discord webhook responded with {response.status_code}: {response.text[:200]}"
+        )
@@ -0,0 +1,22 @@
+class BurndownError(Exception):
+    """Base class of the errors raised while generating a burndown chart."""
+
+
+class ConfigError(BurndownError):
+    """config.json or secrets.json is missing, malformed or lacks a project."""
+
+
+class GitHubAPIError(BurndownError):
+    """GitHub's GraphQL API answered with an error or an unexpected response."""
+
+
+class BadCredentialsError(GitHubAPIError):
+    """The access token was rejected."""
+
+
+class ProjectNotFoundError(GitHubAPIError):
+    """The configured owner or project number does not exist or is not visible."""
+
+
+class WebhookError(BurndownError):
+    """The Discord webhook rejected a post."""
@@ -1,14 +1,34 @@
 import logging
 import os
 import requests
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 import hashlib
 import json
 import tempfile
-
-from config import config, secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+from config import ProjectConfig
+from errors import BadCredentialsError, GitHubAPIError, ProjectNotFoundError
+from .batch import BatchQuery
+from .graphql import (
+    items_by_ids_query,
+    items_end_cursor_query,
+    required_variables,
+    variable_definitions,
+)
 from .project import Project, ProjectV1, ProjectV2
+from .revalidate import Revalidator, current_scope, staleness_scope, submit
+from .singleflight import single_flight
+from .tokens import RATE_LIMIT_ALIAS, TokenPool, with_rate_limit
 from .queries import (
+    ContentAssignedEvents,
+    ContentAssignees,
+    ContentLabels,
     OrganizationProject,
     OrganizationProjectV2,
     RepositoryProject,
@@ -25,6 +45,37 @@ __ch.setFormatter(
 )
 __logger.addHandler(__ch)
 
+# Upper bound on the number of queries merged into one GraphQL document. Keeps
+# a combined page of items well within GitHub's per-request node limit.
+MAX_BATCH_SIZE = 10
+
+# GitHub accepts at most 100 ids per `nodes(ids:)` lookup
+NODES_PER_QUERY = 100
+
+GITHUB_API_URL = "https://api.github.com/graphql"
+
+# Transient failures are retried with exponential backoff, starting at
+# RETRY_BACKOFF seconds, unless the response says how long to wait.
+RETRY_STATUS_CODES = {502, 503, 504}
+MAX_RETRIES = 5
+RETRY_BACKOFF = 1.0
+
+# Seconds a run waits for another process fetching the same query before
+# fetching it itself.
+SINGLE_FLIGHT_TIMEOUT = 60.0
+
+# One pool per set of tokens, shared by every project that uses them
+__token_pools = {}
+__token_pools_lock = threading.Lock()
+
+
+# Follow-up queries for the connections nested in an item's content, which the
+# project queries only fetch the first slice of
+__content_connection_queries = {
+    "timelineItems": ContentAssignedEvents,
+    "labels": ContentLabels,
+    "assignees": ContentAssignees,
+}
 
 __project_v2_queries = {
     "repository": RepositoryProjectV2,
@@ -34,71 +85,606 @@ __project_v2_queries = {
 }
 
 
-def get_repository_project(use_cache: bool = True) -> Project:
-    # query_variables = config["query_variables"]
+def get_repository_project(project_config: ProjectConfig, use_cache: bool = True) -> Project:
+    # query_variables = project_config["query_variables"]
     # query_response = gh_api_query(RepositoryProject, query_variables)
     # project_data = query_response["data"]["repository"]["project"]
     # return ProjectV1(project_data)
-    return get_project_v2("repository", use_cache)
+    return get_project_v2(project_config, None, use_cache)
 
 
-def get_organization_project(use_cache: bool = True) -> Project:
-    # query_variables = config["query_variables"]
+def get_organization_project(project_config: ProjectConfig, use_cache: bool = True) -> Project:
+    # query_variables = project_config["query_variables"]
     # query_response = gh_api_query(OrganizationProject, query_variables)
     # project_data = query_response["data"]["organization"]["project"]
     # return ProjectV1(project_data)
-    return get_project_v2("organization", use_cache)
+    return get_project_v2(project_config, None, use_cache)
+
+
+def get_project_v2(project_config: ProjectConfig, sprint: str, use_cache: bool = True) -> Project:
+    """
+    Fetches a Project V2 board. Within the project's `max_staleness_hours`, a
+    response cached on an earlier day is served as is and refreshed in the
+    background; `data_as_of` is then the time the oldest of them was fetched.
+    """
+    with staleness_scope(__max_staleness(project_config)) as scope:
+        project = __get_project_v2(project_config, sprint, use_cache)
+    project.data_as_of = __data_as_of(scope)
+    if scope.served_stale:
+        __revalidate(project_config, sprint)
+    return project
+
+
+def __get_project_v2(project_config: ProjectConfig, sprint: str, use_cache: bool) -> Project:
+    project_type = project_config.project_type
+    query_variables = project_config["query_variables"].copy()
+    secrets = project_config.secrets
+    # The sprint lookup rides along with the first page so that the following
+    # `get_sprint_dates` call is answered from the cache.
+    prefetch = sprint_prefetch(project_config)
+
+    workers = project_config["settings"].get("fetch_workers", 1)
+    if workers > 1:
+        query = __project_v2_queries[project_type]
+        snapshot = __load_item_snapshot(query, query_variables)
+        project_data = None
+        if snapshot:
+            try:
+                project_data = __refresh_project_v2(
+                    project_type, query_variables, snapshot, workers, use_cache,
+                    prefetch, secrets,
+                )
+            except BadCredentialsError:
+                raise
+            except GitHubAPIError as e:
+                # A snapshot that cannot be refreshed would fail every run
+                __logger.warning(f"Refreshing the known items failed ({e}). Paginating instead.")
+                __remove_item_snapshot(query, query_variables)
+        if project_data is None:
+            project_data = __sharded_project_v2(
+                project_type, query_variables, workers, use_cache,
+                prefetch, secrets,
+            )
+        __complete_content_connections([project_data], workers, use_cache, secrets)
+        return ProjectV2(project_data, sprint)
+
+    projects = __get_projects_v2(
+        [(project_config, sprint)],
+        use_cache,
+        prefetch=prefetch,
+    )
+    return projects[0]
 
 
-def get_project_v2(project_type, sprint: str, use_cache: bool = True) -> Project:
+def sprint_prefetch(project_config: ProjectConfig) -> List[Tuple[str, dict]]:
+    """
+    The sprint lookup of a project, to batch with its first page. Empty if the
+    project's `query_variables` lack a variable the lookup requires, as one
+    undefined variable would fail the whole batched document.
+    """
+    query = __project_v2_queries["sprint"]
+    query_variables = project_config["query_variables"].copy()
+    if any(name not in query_variables for name in required_variables(query)):
+        return []
+    return [(query, query_variables)]
+
+
+def get_projects_v2(
+    projects: List[Tuple[ProjectConfig, str]],
+    use_cache: bool = True,
+    prefetch: List[Tuple[str, dict]] = (),
+) -> List[Project]:
+    """
+    Fetches several Project V2 boards, given as (project_config, sprint)
+    tuples, with one GraphQL round-trip per page instead of one per project
+    and page. Only projects that still have more pages take part in the
+    following round-trips. `prefetch` queries are merged into the first
+    round-trip so their responses end up in the cache. The requests are sent
+    with the secrets and `max_staleness_hours` of the first project, and as
+    their pages are shared, every project gets the same `data_as_of`.
+    """
+    with staleness_scope(__max_staleness(projects[0][0])) as scope:
+        fetched = __get_projects_v2(projects, use_cache, prefetch)
+    for project in fetched:
+        project.data_as_of = __data_as_of(scope)
+    if scope.served_stale:
+        for project_config, sprint in projects:
+            __revalidate(project_config, sprint)
+    return fetched
+
+
+def __get_projects_v2(
+    projects: List[Tuple[ProjectConfig, str]],
+    use_cache: bool,
+    prefetch: List[Tuple[str, dict]] = (),
+) -> List[Project]:
+    secrets = projects[0][0].secrets
+    project_types = [project_config.project_type for project_config, _ in projects]
+    requests_ = [
+        (__project_v2_queries[project_type], project_config["query_variables"].copy())
+        for project_type, (project_config, _) in zip(project_types, projects)
+    ]
+    responses = gh_api_batch_query(requests_ + list(prefetch), use_cache, secrets)
+
+    project_data = []
+    for (project_config, _), response in zip(projects, responses):
+        try:
+            project_data.append(__extract_project_v2(project_config.project_type, response))
+        except GitHubAPIError as e:
+            raise type(e)(f"{project_config.project_type}/{project_config.project_name}: {e}") from e
+    page_infos = [data["items"]["pageInfo"] for data in project_data]
+
+    pending = [i for i, page_info in enumerate(page_infos) if page_info["hasNextPage"]]
+    while pending:
+        page_requests = [
+            (requests_[i][0], {**requests_[i][1], "cursor": page_infos[i]["endCursor"]})
+            for i in pending
+        ]
+        page_responses = gh_api_batch_query(page_requests, use_cache, secrets)
+        for i, response in zip(pending, page_responses):
+            items = __extract_project_v2(project_types[i], response)["items"]
+            project_data[i]["items"]["nodes"].extend(items["nodes"])
+            page_infos[i] = items["pageInfo"]
+        pending = [i for i in pending if page_infos[i]["hasNextPage"]]
+
+    for (query, query_variables), data, page_info in zip(requests_, project_data, page_infos):
+        __save_item_snapshot(query, query_variables, data, page_info["endCursor"])
+    __complete_content_connections(
+        project_data, projects[0][0]["settings"].get("fetch_workers", 1), use_cache, secrets
+    )
+
+    return [ProjectV2(data, sprint) for data, (_, sprint) in zip(project_data, projects)]
+
+
+def __max_staleness(project_config: ProjectConfig) -> Optional[float]:
+    hours = project_config["settings"].get("max_staleness_hours")
+    return hours * 3600 if hours else None
+
+
+def __data_as_of(scope) -> Optional[datetime]:
+    if scope.data_as_of is None:
+        return None
+    return datetime.fromtimestamp(scope.data_as_of, timezone.utc)
+
+
+def __complete_content_connections(
+    project_data: List[dict], workers: int, use_cache: bool, secrets: dict
+):
+    """
+    Fetches the rest of every issue's and pull request's assigned events and
+    labels, where the project query only got the first slice. The overflowing
+    connections are followed up page by page, with the pages of up to
+    `MAX_BATCH_SIZE` connections merged into one request and `workers`
+    requests in flight.
+    """
+    pending = []
+    for data in project_data:
+        for node in data["items"]["nodes"]:
+            content = (node or {}).get("content") or {}
+            for connection in __content_connection_queries:
+                page = content.get(connection) or {}
+                if (page.get("pageInfo") or {}).get("hasNextPage"):
+                    pending.append((content["id"], connection, page))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while pending:
+            requests_ = [
+                (
+                    __content_connection_queries[connection],
+                    {"content_id": content_id, "cursor": page["pageInfo"]["endCursor"]},
+                )
+                for content_id, connection, page in pending
+            ]
+            chunks = [
+                submit(
+                    pool,
+                    gh_api_batch_query,
+                    requests_[start : start + MAX_BATCH_SIZE],
+                    use_cache,
+                    secrets,
+                )
+                for start in range(0, len(requests_), MAX_BATCH_SIZE)
+            ]
+            responses = [response for chunk in chunks for response in chunk.result()]
+            for (_, connection, page), response in zip(pending, responses):
+                # An issue or pull request deleted meanwhile is a NOT_FOUND
+                errors = [
+                    error
+                    for error in response.get("errors") or []
+                    if not (error.get("type") == "NOT_FOUND" and (error.get("path") or [None])[0] == "node")
+                ]
+                if errors:
+                    raise GitHubAPIError(f"GraphQL Errors: {errors}")
+                next_page = ((response.get("data") or {}).get("node") or {}).get(connection)
+                if next_page is None:
+                    # The issue or pull request is gone or no longer visible
+                    page["pageInfo"]["hasNextPage"] = False
+                    continue
+                page["nodes"].extend(next_page["nodes"])
+                page["pageInfo"] = next_page["pageInfo"]
+            pending = [p for p in pending if p[2]["pageInfo"]["hasNextPage"]]
+
+
+def __refresh_project_v2(
+    project_type: str,
+    query_variables: dict,
+    snapshot: dict,
+    workers: int,
+    use_cache: bool,
+    prefetch: List[Tuple[str, dict]],
+    secrets: dict,
+) -> dict:
+    """
+    Re-fetches a project whose item ids are known from a previous run without
+    following the cursor chain: the known ids are split into `nodes(ids:)`
+    queries of NODES_PER_QUERY ids that run on `workers` threads, next to the
+    first page (for the project fields) and a cursor scan resuming after the
+    last item seen, which picks up the items added since.
+
+    Item cursors are offsets, so once items are removed that scan starts past
+    some of the new ones. Returns None, for the caller to fetch the project
+    anew, when the items found do not add up to the board's item count.
+    """
     query = __project_v2_queries[project_type]
-    query_variables = config["query_variables"].copy()
-    query_response = gh_api_query(query, query_variables, use_cache)
+    nodes_query = items_by_ids_query(query)
+    nodes_variables = {
+        name: value
+        for name, value in query_variables.items()
+        if name in variable_definitions(nodes_query)
+    }
+    ids = snapshot["ids"]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        first_page = submit(
+            pool, gh_api_batch_query, [(query, query_variables)] + prefetch, use_cache, secrets
+        )
+        new_items = submit(
+            pool,
+            __items_after,
+            project_type,
+            query_variables,
+            snapshot["endCursor"],
+            use_cache,
+            secrets,
+        )
+        known_items = [
+            submit(
+                pool,
+                gh_api_query,
+                nodes_query,
+                {**nodes_variables, "ids": ids[start : start + NODES_PER_QUERY]},
+                use_cache,
+                secrets,
+            )
+            for start in range(0, len(ids), NODES_PER_QUERY)
+        ]
+
+        project_data = __extract_project_v2(project_type, first_page.result()[0])
+        nodes = list(project_data["items"]["nodes"])
+        for response in known_items:
+            # Items deleted since the previous run come back as null, next to
+            # a NOT_FOUND error each
+            errors = [
+                error
+                for error in response.result().get("errors") or []
+                if not (error.get("type") == "NOT_FOUND" and (error.get("path") or [None])[0] == "nodes")
+            ]
+            if errors:
+                raise GitHubAPIError(f"GraphQL Errors: {errors}")
+            nodes.extend(response.result()["data"]["nodes"])
+        added_nodes, end_cursor = new_items.result()
+        nodes.extend(added_nodes)
+
+    # Deleted items are null. Archived ones are dropped, as `items` does.
+    unique_nodes = {}
+    for node in nodes:
+        if node and not node.pop("isArchived", False) and node["id"] not in unique_nodes:
+            unique_nodes[node["id"]] = node
+    if len(unique_nodes) != project_data["items"]["totalCount"]:
+        __logger.warning("The known and new items do not cover the project. Fetching it anew.")
+        return None
+    project_data["items"]["nodes"] = list(unique_nodes.values())
+
+    __save_item_snapshot(query, query_variables, project_data, end_cursor)
+    return project_data
+
+
+def __sharded_project_v2(
+    project_type: str,
+    query_variables: dict,
+    workers: int,
+    use_cache: bool,
+    prefetch: List[Tuple[str, dict]],
+    secrets: dict,
+) -> dict:
+    """
+    Fetches a project as disjoint shards, one `items(query:)` cursor stream per
+    Status option plus one for the items without a status, paginated on
+    `workers` threads. Takes about as many round-trips as the largest column
+    has pages, instead of as many as the whole board has.
+
+    The shards are concatenated in column order, which keeps every column's
+    cards in board order. If they do not add up to the board's item count, the
+    board is paginated in a single stream instead. Either way, the item ids
+    and the board's last cursor are saved for `__refresh_project_v2`.
+    """
+    query = __project_v2_queries[project_type]
+    response = gh_api_batch_query([(query, query_variables)] + prefetch, use_cache, secrets)[0]
+    project_data = __extract_project_v2(project_type, response)
+    items = project_data["items"]
+    if not items["pageInfo"]["hasNextPage"]:
+        __save_item_snapshot(query, query_variables, project_data, items["pageInfo"]["endCursor"])
+        return project_data
+
+    options = [option["name"] for option in (project_data.get("field") or {}).get("options", [])]
+    shard_queries = ["no:status"] + [f'status:"{__escape_filter(name)}"' for name in options]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Asked no later than the shards, so items added meanwhile are either
+        # in a shard or after this cursor
+        cursor_query = items_end_cursor_query(query)
+        cursor_variables = {
+            name: value
+            for name, value in query_variables.items()
+            if name in variable_definitions(cursor_query)
+        }
+        end_cursor = submit(pool, gh_api_query, cursor_query, cursor_variables, use_cache, secrets)
+        shards = [
+            submit(
+                pool,
+                __items_after,
+                project_type,
+                {**query_variables, "items_query": shard_query},
+                None,
+                use_cache,
+                secrets,
+            )
+            for shard_query in shard_queries
+        ]
+        nodes = [node for shard in shards for node in shard.result()[0]]
+
+    if len(nodes) != items["totalCount"] or len({node["id"] for node in nodes}) != len(nodes):
+        __logger.warning("Status shards do not cover the project. Paginating it in one stream.")
+        nodes, end_cursor = __items_after(
+            project_type, query_variables, items["pageInfo"]["endCursor"], use_cache, secrets
+        )
+        items["nodes"].extend(nodes)
+        __save_item_snapshot(query, query_variables, project_data, end_cursor)
+        return project_data
+
+    project_data["items"]["nodes"] = nodes
+    last_items = __extract_project_v2(project_type, end_cursor.result())["items"]
+    __save_item_snapshot(query, query_variables, project_data, last_items["pageInfo"]["endCursor"])
+    return project_data
+
+
+def __escape_filter(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def __items_after(
+    project_type: str, query_variables: dict, cursor: str, use_cache: bool, secrets: dict
+):
+    """Paginates a project's items after `cursor`. Returns them and the last cursor."""
+    query = __project_v2_queries[project_type]
+    nodes = []
+    while True:
+        response = gh_api_query(query, {**query_variables, "cursor": cursor}, use_cache, secrets)
+        items = __extract_project_v2(project_type, response)["items"]
+        nodes.extend(items["nodes"])
+        cursor = items["pageInfo"]["endCursor"] or cursor
+        if not items["pageInfo"]["hasNextPage"]:
+            return nodes, cursor
+
+
+def __load_item_snapshot(query: str, query_variables: dict, kind: str = "items"):
+    try:
+        with open(__snapshot_path(query, query_variables, kind), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def __save_item_snapshot(query: str, query_variables: dict, project_data: dict, end_cursor):
+    """Remembers a project's item ids and last cursor for `__refresh_project_v2`."""
+    snapshot = {
+        "ids": [node["id"] for node in project_data["items"]["nodes"]],
+        "endCursor": end_cursor,
+    }
+    __write_json_atomic(__snapshot_path(query, query_variables), snapshot)
+
+
+def __remove_item_snapshot(query: str, query_variables: dict):
+    try:
+        os.remove(__snapshot_path(query, query_variables))
+    except FileNotFoundError:
+        pass
+
 
+def __snapshot_path(query: str, query_variables: dict, kind: str = "items") -> str:
+    # Not day-keyed: the ids stay useful across days
+    variables = {k: v for k, v in query_variables.items() if k != "cursor"}
+    payload = json.dumps(prepare_payload(query, variables), sort_keys=True)
+    filename = f"{hashlib.sha256(payload.encode('utf-8')).hexdigest()}.{kind}.json"
+    return os.path.join(tempfile.gettempdir(), filename)
+
+
+def __extract_project_v2(project_type: str, query_response: dict) -> dict:
     if "errors" in query_response:
-        __logger.critical(f"GraphQL Errors: {query_response['errors']}")
-        exit(1)
+        errors = query_response["errors"]
+        if all(error.get("type") == "NOT_FOUND" for error in errors):
+            raise ProjectNotFoundError(f"Project not found: {errors}")
+        raise GitHubAPIError(f"GraphQL Errors: {errors}")
 
-    data_root = query_response.get("data", {}).get(project_type, {})
+    data_root = (query_response.get("data") or {}).get(project_type, {})
     if not data_root:
-        __logger.critical(
+        raise ProjectNotFoundError(
             f"Could not find {project_type} data. Check your config names."
         )
-        exit(1)
     project_data = data_root.get("projectV2")
     if not project_data:
-        __logger.critical(f"ProjectV2 not found. Check project_number in config.")
-        exit(1)
+        raise ProjectNotFoundError("ProjectV2 not found. Check project_number in config.")
+    return project_data
 
-    page_info = project_data["items"]["pageInfo"]
-    while page_info["hasNextPage"]:
-        query_variables["cursor"] = page_info["endCursor"]
-        query_response = gh_api_query(query, query_variables, use_cache)
-        items = query_response["data"][project_type]["projectV2"]["items"]
-        project_data["items"]["nodes"].extend(items["nodes"])
-        page_info = items["pageInfo"]
 
-    return ProjectV2(project_data, sprint)
+def gh_api_query(
+    query: str, variables: dict, use_cache: bool = True, secrets: Optional[dict] = None
+) -> dict:
+    return __single_flight_query(query, variables, use_cache, time.time(), secrets or {})
 
 
-def gh_api_query(query: str, variables: dict, use_cache: bool = True) -> dict:
+def __single_flight_query(
+    query, variables, use_cache: bool, started: float, secrets: dict
+) -> dict:
+    """
+    Fetches a response while holding the cross-process lock for its cache
+    key, so concurrent runs make one API call per query instead of one each.
+    A run that had to wait reuses the response cached while it waited.
+    """
     response = None
     if use_cache:
-        response = __get_from_cache(query, variables)
+        response = __get_cached(query, variables, secrets)
     if not response:
-        response = __get_from_api(query, variables)
-        __cache_response(query, variables, response)
+        with single_flight(__temp_path(query, variables), SINGLE_FLIGHT_TIMEOUT):
+            response = __get_from_cache(
+                query, variables, newer_than=None if use_cache else started
+            )
+            if not response:
+                response = __get_from_api(query, variables, secrets)
+                __cache_response(query, variables, response)
     return response
 
 
+def gh_api_batch_query(
+    requests_: List[Tuple[str, dict]],
+    use_cache: bool = True,
+    secrets: Optional[dict] = None,
+) -> List[dict]:
+    """
+    Answers several (query, variables) requests, merging the ones missing from
+    the cache into aliased GraphQL documents of up to `MAX_BATCH_SIZE` queries.
+    Each response is cached under its own request, as `gh_api_query` would.
+    Requests another process is already fetching are left to that process.
+    """
+    started = time.time()
+    secrets = secrets or {}
+    responses = [
+        __get_cached(query, variables, secrets) if use_cache else None
+        for query, variables in requests_
+    ]
+    missing = [i for i, response in enumerate(responses) if not response]
+
+    contended = []
+    with ExitStack() as locks:
+        owned = []
+        for i in missing:
+            lock = single_flight(__temp_path(*requests_[i]), timeout=0)
+            (owned if locks.enter_context(lock) else contended).append(i)
+
+        for start in range(0, len(owned), MAX_BATCH_SIZE):
+            chunk = owned[start : start + MAX_BATCH_SIZE]
+            if len(chunk) == 1:
+                response = __get_from_api(*requests_[chunk[0]], secrets)
+                __cache_response(*requests_[chunk[0]], response)
+                responses[chunk[0]] = response
+                continue
+
+            batch = BatchQuery()
+            for i in chunk:
+                batch.add(*requests_[i])
+            combined = __get_from_api(batch.document(), batch.variables(), secrets)
+            for i, response in zip(chunk, batch.split(combined)):
+                __cache_response(*requests_[i], response)
+                responses[i] = response
+
+    for i in contended:
+        responses[i] = __single_flight_query(*requests_[i], use_cache, started, secrets)
+    return responses
+
+
+def revalidate_project(request: list):
+    """
+    Fetches a project that was served stale again, from its first page and
+    through the usual batched queries, so every page is cached under the
+    cursors of the fresh fetch. Does nothing if a refresh of the project that
+    started after the request has completed since. `request` is built by
+    `__revalidate`.
+    """
+    project_type, project_name, project, secrets, sprint, requested_at = request
+    project_config = ProjectConfig(project_type, project_name, project, secrets)
+    query = __project_v2_queries[project_type]
+    query_variables = project_config["query_variables"].copy()
+    # Only written once every page is cached anew, unlike the pages themselves
+    marker = __load_item_snapshot(query, query_variables, "refreshed")
+    if marker and marker["started"] >= requested_at:
+        return
+    started = time.time()
+    get_project_v2(project_config, sprint, use_cache=False)
+    __write_json_atomic(
+        __snapshot_path(query, query_variables, "refreshed"), {"started": started}
+    )
+
+
+# Refreshes the projects served stale by this process
+__revalidator = Revalidator(revalidate_project)
+
+
+def __revalidate(project_config: ProjectConfig, sprint: Optional[str]):
+    key = json.dumps(
+        [project_config.project_type, project_config["query_variables"]], sort_keys=True
+    )
+    request = [
+        project_config.project_type,
+        project_config.project_name,
+        {
+            "query_variables": project_config["query_variables"],
+            "settings": project_config["settings"],
+        },
+        project_config.secrets,
+        sprint,
+        time.time(),
+    ]
+    __revalidator.submit(key, request)
+
+
+def defer_revalidation():
+    """
+    Keeps the refreshes for `detach_revalidation` instead of running them on
+    threads of this process, which a short-lived run would cut off on exit.
+    """
+    __revalidator.defer()
+
+
+def detach_revalidation() -> int:
+    """
+    Hands the refreshes still pending over to a detached process, so that a
+    short-lived run can exit without waiting for them. Returns how many.
+    """
+    return __revalidator.detach()
+
+
 def prepare_payload(query, variables):
     return {"query": query, "variables": variables}
 
 
-def get_all_sprints():
+def get_all_sprints(project_config: ProjectConfig):
+    if not sprint_prefetch(project_config):
+        # Without them the query is rejected; the config's sprint dates apply
+        __logger.warning(
+            f"{project_config.project_type}/{project_config.project_name}: "
+            "the query_variables do not identify the project's iterations."
+        )
+        return []
     query = __project_v2_queries["sprint"]
-    query_variables = config["query_variables"].copy()
-    response = gh_api_query(query, query_variables, True)
+    query_variables = project_config["query_variables"].copy()
+    with staleness_scope(__max_staleness(project_config)) as scope:
+        response = gh_api_query(query, query_variables, True, project_config.secrets)
+    if scope.served_stale:
+        # The iterations are fetched along with the project's first page
+        __revalidate(project_config, None)
+
+    if "errors" in response:
+        __logger.error(f"Failed to fetch iterations: {response['errors']}")
+        return []
 
     # Navigate the response structure
     # user -> projectV2 -> field -> configuration -> iterations
@@ -107,8 +693,8 @@ def get_all_sprints():
         field_data = data["field"]
 
         if not field_data:
-            print(
-                f"Error: Field '{query_variables.get('sprint_field_name', 'Sprint')}' not found."
+            __logger.error(
+                f"Field '{query_variables.get('sprint_field_name', 'Sprint')}' not found."
             )
             return []
 
@@ -117,12 +703,12 @@ def get_all_sprints():
         return iterations
 
     except (KeyError, TypeError) as e:
-        print(f"Failed to parse iterations: {e}")
+        __logger.error(f"Failed to parse iterations: {e}")
         return []
 
 
-def get_sprint_dates(target_sprint: str):
-    sprints = get_all_sprints()
+def get_sprint_dates(project_config: ProjectConfig, target_sprint: str):
+    sprints = get_all_sprints(project_config)
 
     for s in sprints:
         if s.get("title") == target_sprint:
@@ -134,8 +720,8 @@ def get_sprint_dates(target_sprint: str):
     return None, None
 
 
-def print_sprint_schedule():
-    sprints = get_all_sprints()
+def print_sprint_schedule(project_config: ProjectConfig):
+    sprints = get_all_sprints(project_config)
     print(f"\nFound {len(sprints)} Sprints in Project:")
     print("-" * 60)
     print(f"{'Title':<20} | {'Start Date':<12} | {'Duration':<5} | {'End Date'}")
@@ -152,60 +738,173 @@ def print_sprint_schedule():
     print("-" * 60)
 
 
-def __get_from_api(query, variables):
-    headers = (
-        {"Authorization": "bearer %s" % secrets["github_token"]}
-        if "github_token" in secrets
-        else {}
-    )
+def __get_from_api(query, variables, secrets: dict):
+    pool = __token_pool(secrets)
+    api_url = secrets.get("github_api_url") or GITHUB_API_URL
+    payload = prepare_payload(with_rate_limit(query) if len(pool) else query, variables)
+
+    for attempt in range(MAX_RETRIES + 1):
+        token = pool.acquire()
+        headers = {"Authorization": "bearer %s" % token} if token is not None else {}
+        http_response = requests.post(api_url, headers=headers, json=payload)
+        delay = __retry_delay(http_response, attempt)
+        if delay is None and len(pool) and __is_rate_limited(http_response):
+            reset = http_response.headers.get("X-RateLimit-Reset")
+            pool.exhaust(token, float(reset) if reset else None)
+            __logger.warning(
+                f"Token ...{token[-4:]} is rate limited. "
+                + ("Switching tokens." if pool.has_headroom() else "Waiting for a reset.")
+            )
+            continue
+        if delay is None or attempt == MAX_RETRIES:
+            break
+        __logger.warning(
+            f"GitHub API responded with {http_response.status_code}. "
+            f"Retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES})."
+        )
+        time.sleep(delay)
 
-    response = requests.post(
-        "https://api.github.com/graphql",
-        headers=headers,
-        json=prepare_payload(query, variables),
-    ).json()
+    try:
+        response = http_response.json()
+    except ValueError as e:
+        raise GitHubAPIError(
+            f"GitHub API responded with {http_response.status_code} "
+            "and a body that is not JSON."
+        ) from e
 
     # Gracefully report failures due to bad credentials
     if response.get("message") and response["message"] == "Bad credentials":
-        __logger.critical(response["message"])
-        __logger.critical(
-            "Failed to extract project data from GitHub due "
-            "to an invalid access token."
-        )
-        __logger.critical(
-            "Please set the `github_token` key in the "
-            "`src/secrets.json` file to a valid access token with access "
+        raise BadCredentialsError(
+            "Bad credentials. Failed to extract project data from GitHub due "
+            "to an invalid access token. Please set the `github_token` key in "
+            "the `src/secrets.json` file to a valid access token with access "
             "to the repo specified in the `src/config.json` file."
         )
-        exit(1)
-    # Gracefully report failures due to errors
-    elif response.get("errors"):
-        __logger.critical(
-            "Failed to extract project data from GitHub due to " "an error."
+    # Gracefully report failures due to errors. Errors next to data only
+    # concern some fields (e.g. one query of a batch), and are left to the
+    # callers of those fields.
+    elif response.get("errors") and not response.get("data"):
+        raise GitHubAPIError(
+            f"Failed to extract project data from GitHub due to an error: {response['errors']}"
         )
-        __logger.critical(response["errors"])
-        exit(1)
+
+    data = response.get("data")
+    if isinstance(data, dict) and RATE_LIMIT_ALIAS in data:
+        pool.update(token, data.pop(RATE_LIMIT_ALIAS))
     return response
 
 
-def __get_from_cache(query, variables):
-    temp_path = __temp_path(query, variables)
-    if os.path.exists(temp_path):
-        with open(temp_path, "r") as f:
-            return json.load(f)
+def __token_pool(secrets: dict) -> TokenPool:
+    """
+    The pool of the tokens in `secrets`: the `github_tokens` pool, or the
+    single `github_token`.
+    """
+    tokens = secrets.get("github_tokens") or (
+        [secrets["github_token"]] if "github_token" in secrets else []
+    )
+    key = json.dumps(tokens, sort_keys=True)
+    with __token_pools_lock:
+        if key not in __token_pools:
+            __token_pools[key] = TokenPool(tokens)
+        return __token_pools[key]
+
+
+def __is_rate_limited(http_response) -> bool:
+    try:
+        errors = http_response.json().get("errors") or []
+    except ValueError:
+        return False
+    return any(isinstance(e, dict) and e.get("type") == "RATE_LIMITED" for e in errors)
+
+
+def __retry_delay(http_response, attempt: int):
+    """
+    Returns how many seconds to wait before retrying a transient failure
+    (gateway errors and secondary rate limits), or None if it is final.
+    """
+    status = http_response.status_code
+    retry_after = http_response.headers.get("Retry-After")
+    if status in (403, 429) and (
+        retry_after or "secondary rate limit" in http_response.text
+    ):
+        delay = __parse_retry_after(retry_after) if retry_after else None
+        return delay if delay is not None else RETRY_BACKOFF * 2**attempt
+    if status in RETRY_STATUS_CODES:
+        return RETRY_BACKOFF * 2**attempt
     return None
 
 
+def __parse_retry_after(value: str) -> Optional[float]:
+    """Seconds to wait from a `Retry-After` header: delay-seconds or an HTTP-date."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def __get_cached(query, variables, secrets: dict):
+    """
+    The cached response of a request if it was fetched today. Within a
+    staleness scope, an older response is returned as well as long as it is
+    no older than the scope allows. The project it belongs to is then
+    refreshed in the background once the scope's fetch is done.
+    """
+    response, fetched_at = __read_cache(query, variables)
+    if response is None:
+        return None
+    if date.fromtimestamp(fetched_at) == date.today():
+        return response
+
+    scope = current_scope()
+    if not scope or scope.max_staleness is None or time.time() - fetched_at > scope.max_staleness:
+        return None
+    scope.served_stale.append(fetched_at)
+    return response
+
+
+def __get_from_cache(query, variables, newer_than: float = None):
+    """The cached response of a request if it was fetched today, and after `newer_than`."""
+    response, fetched_at = __read_cache(query, variables)
+    if response is None or date.fromtimestamp(fetched_at) != date.today():
+        return None
+    if newer_than and fetched_at < newer_than:
+        return None
+    return response
+
+
+def __read_cache(query, variables):
+    """A cached response and the time it was fetched, or (None, None)."""
+    try:
+        with open(__temp_path(query, variables), "r") as f:
+            return json.load(f), os.fstat(f.fileno()).st_mtime
+    except FileNotFoundError:
+        return None, None
+
+
 def __cache_response(query, variables, response):
-    temp_path = __temp_path(query, variables)
-    with open(temp_path, "w") as f:
-        json.dump(response, f)
+    # Partial failures are not cached, so the next run asks again
+    if "errors" in response:
+        return
+    __write_json_atomic(__temp_path(query, variables), response)
+
+
+def __write_json_atomic(path, data):
+    # Write then rename, so concurrent readers never see a partial file
+    fd, partial_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(partial_path, path)
 
 
 def __temp_path(query, variables):
     temp_dir = tempfile.gettempdir()
     payload = prepare_payload(query, variables)
-    payload.update({"today": str(date.today())})
+    # Not day-keyed: a response is fresh on the day it was written (see
+    # `__get_from_cache`), and may be served stale after that
     filename = f"{hashlib.sha256(json.dumps(payload).encode('utf-8')).hexdigest()}.json"
     temp_path = os.path.join(temp_dir, filename)
     return temp_path
@@ -0,0 +1,119 @@
+import re
+from typing import Any, Dict, List
+
+# Matches `query Name($a: Type, ...) {` at the start of a single-operation document.
+_OPERATION_HEADER = re.compile(r"^\s*query\s+\w*\s*(?:\((?P<vars>[^)]*)\))?\s*\{", re.S)
+_VARIABLE = re.compile(r"\$(\w+)")
+_COMMENT = re.compile(r"#[^\n]*")
+_ROOT_FIELD = re.compile(r"^\s*(?:(?P<alias>\w+)\s*:\s*)?(?P<name>\w+)")
+
+
+def split_root_fields(body: str) -> List[str]:
+    """
+    Splits the top-level selection set of an operation into its root fields,
+    e.g. `user(login: $x) { ... }` and `rateLimit { cost }`.
+    """
+    fields, depth, start, in_string = [], 0, 0, False
+    for i, char in enumerate(body):
+        if char == '"' and body[i - 1] != "\\":
+            in_string = not in_string
+        if in_string:
+            continue
+        if char in "({":
+            depth += 1
+        elif char in ")}":
+            depth -= 1
+            if depth == 0 and char == "}":
+                fields.append(body[start : i + 1])
+                start = i + 1
+    tail = body[start:].strip()
+    if tail:
+        # Scalar root fields without a selection set
+        fields.extend(tail.split())
+    return [f.strip() for f in fields if f.strip()]
+
+
+class BatchQuery:
+    """
+    Merges several single-operation GraphQL queries into one document.
+
+    Each query's variables are renamed with a per-query prefix and each of
+    its root fields is aliased with the same prefix, so one HTTP round-trip
+    answers all of them. `split` turns the combined response back into one
+    response per query, shaped exactly as if it had been sent on its own.
+    """
+
+    def __init__(self):
+        self._definitions: List[str] = []
+        self._selections: List[str] = []
+        self._variables: Dict[str, Any] = {}
+        self._root_keys: List[List[str]] = []
+
+    def __len__(self):
+        return len(self._root_keys)
+
+    def add(self, query: str, variables: dict) -> int:
+        index = len(self._root_keys)
+        prefix = f"b{index}_"
+
+        query = _COMMENT.sub("", query)
+        header = _OPERATION_HEADER.match(query)
+        if not header:
+            raise ValueError("Only single `query` operations can be batched.")
+        body = query[header.end() : query.rstrip().rindex("}")]
+
+        declared = []
+        if header.group("vars"):
+            for definition in header.group("vars").split(","):
+                definition = definition.strip()
+                if definition:
+                    declared.append(_VARIABLE.match(definition).group(1))
+                    self._definitions.append(_VARIABLE.sub(rf"${prefix}\1", definition))
+        for name in declared:
+            if name in variables:
+                self._variables[prefix + name] = variables[name]
+
+        root_keys = []
+        for selection in split_root_fields(_VARIABLE.sub(rf"${prefix}\1", body)):
+            root = _ROOT_FIELD.match(selection)
+            key = root.group("alias") or root.group("name")
+            root_keys.append(key)
+            self._selections.append(f"{prefix}{key}: {selection[root.start('name'):]}")
+        self._root_keys.append(root_keys)
+        return index
+
+    def document(self) -> str:
+        definitions = f"({', '.join(self._definitions)})" if self._definitions else ""
+        selections = "\n  ".join(self._selections)
+        return f"query Batch{definitions} {{\n  {selections}\n}}"
+
+    def variables(self) -> dict:
+        return dict(self._variables)
+
+    def split(self, response: dict) -> List[dict]:
+        data = response.get("data") or {}
+        errors = response.get("errors") or []
+        results = []
+        for index, root_keys in enumerate(self._root_keys):
+            prefix = f"b{index}_"
+            result: Dict[str, Any] = {
+                "data": {key: data.get(prefix + key) for key in root_keys}
+            }
+            own_errors = [
+                self.__unprefix_error(error, prefix)
+                for error in errors
+                if not error.get("path") or str(error["path"][0]).startswith(prefix)
+            ]
+            if own_errors:
+                result["errors"] = own_errors
+            results.append(result)
+        return results
+
+    @staticmethod
+    def __unprefix_error(error: dict, prefix: str) -> dict:
+        if not error.get("path"):
+            return error
+        error = dict(error)
+        error["path"] = [error["path"][0][len(prefix) :]] + error["path"][1:]
+        return error
+
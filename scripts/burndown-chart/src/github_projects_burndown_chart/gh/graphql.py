@@ -0,0 +1,81 @@
+import re
+from typing import Dict, List
+
+_OPERATION_HEADER = re.compile(r"^\s*query\s+(?P<name>\w*)\s*(?:\((?P<vars>[^)]*)\))?\s*\{", re.S)
+_VARIABLE = re.compile(r"\$(\w+)")
+
+
+def variable_definitions(query: str) -> Dict[str, str]:
+    """Maps each variable declared by the query to its definition, e.g. `$cursor: String`."""
+    header = _OPERATION_HEADER.match(query)
+    definitions = {}
+    for definition in (header.group("vars") or "").split(","):
+        definition = definition.strip()
+        if definition:
+            definitions[_VARIABLE.match(definition).group(1)] = definition
+    return definitions
+
+
+def required_variables(query: str) -> List[str]:
+    """The variables the query declares as non-null without a default value."""
+    return [
+        name
+        for name, definition in variable_definitions(query).items()
+        if definition.endswith("!") and "=" not in definition
+    ]
+
+
+def selection_set(query: str, start: int) -> str:
+    """The `{ ... }` selection set opening at or after `start`, braces included."""
+    opening = query.index("{", start)
+    depth = 0
+    for i in range(opening, len(query)):
+        if query[i] == "{":
+            depth += 1
+        elif query[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return query[opening : i + 1]
+    raise ValueError("Unbalanced selection set.")
+
+
+def items_by_ids_query(project_query: str) -> str:
+    """
+    Derives a `nodes(ids: $ids)` query from a Project V2 query, selecting
+    exactly the fields that query selects on each of its `items`. Keeps both
+    in sync, so items fetched by id are indistinguishable from paginated ones.
+    `isArchived` is selected as well, since `nodes(ids:)` also returns the
+    archived items that `items` leaves out.
+    """
+    items = project_query.index("items(")
+    item_fields = selection_set(project_query, project_query.index("nodes", items))
+    definitions = variable_definitions(project_query)
+    used = [definitions[name] for name in dict.fromkeys(_VARIABLE.findall(item_fields))]
+    name = _OPERATION_HEADER.match(project_query).group("name")
+    return (
+        f"query {name}ItemsByIds($ids: [ID!]!{''.join(', ' + d for d in used)}) {{\n"
+        f"  nodes(ids: $ids) {{\n"
+        f"    ... on ProjectV2Item {{\n      isArchived{item_fields[1:]}\n"
+        f"  }}\n"
+        f"}}"
+    )
+
+
+def items_end_cursor_query(project_query: str) -> str:
+    """
+    Derives a query for the cursor after the last item of a Project V2 board
+    from a project query. Its `items` selection is replaced by the last
+    item's cursor, from which a later `items(after:)` scan resumes.
+    """
+    items = project_query.index("items(")
+    item_selection = selection_set(project_query, items)
+    end = project_query.index(item_selection, items) + len(item_selection)
+    header = _OPERATION_HEADER.match(project_query)
+    body = (
+        project_query[header.end() : items]
+        + "items(last: 1) { pageInfo { endCursor } }"
+        + project_query[end:]
+    )
+    definitions = variable_definitions(project_query)
+    used = [definitions[name] for name in dict.fromkeys(_VARIABLE.findall(body))]
+    return f"query {header.group('name')}ItemsEndCursor({', '.join(used)}) {{{body}"
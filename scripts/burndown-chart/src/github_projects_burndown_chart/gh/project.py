@@ -1,10 +1,13 @@
 from datetime import datetime
+from typing import List, Optional
 from dateutil.parser import isoparse
-from config import config
 
 
 class Project:
     columns = None
+    # When the oldest cached response behind the project was fetched, if it
+    # was served stale
+    data_as_of: Optional[datetime] = None
 
     @property
     def total_points(self):
@@ -41,7 +44,6 @@ class ProjectV2(Project):
             )
         self.name = project_data.get("title", "Project")
         self.target_sprint = sprint
-        print(self.target_sprint)
         self.columns = self.__parse_columns(project_data)
 
     def __parse_columns(self, project_data):
@@ -87,16 +89,26 @@ class Card:
         self.raw_data = card_data
         content = card_data.get("content") or {}
 
+        self.id = card_data.get("id")
+        self.title = content.get("title") or card_data.get("note")
+        self.status = (card_data.get("fieldValueByName") or {}).get("name")
+        self.content_type = content.get("__typename")
+        self.labels = self.__parse_names(content, "labels", "name")
+        self.assignees = self.__parse_names(content, "assignees", "login")
+
         self.created = self.__parse_createdAt(content)
-        self.assigned = self.__parse_assignedAt(content)
+        self.assignments = self.__parse_assignments(content)
+        self.assigned = self.assignments[0] if self.assignments else None
         self.closed = self.__parse_closedAt(content)
         self.points = self.__parse_points(card_data)
 
-    def __parse_assignedAt(self, content) -> datetime:
-        assigned_dates = content.get("timelineItems", {}).get("nodes", [])
-        if assigned_dates:
-            return isoparse(assigned_dates[0]["createdAt"])
-        return None
+    def __parse_names(self, content, connection, key) -> List[str]:
+        nodes = (content.get(connection) or {}).get("nodes") or []
+        return [node[key] for node in nodes if node and node.get(key)]
+
+    def __parse_assignments(self, content) -> List[datetime]:
+        assigned_events = (content.get("timelineItems") or {}).get("nodes") or []
+        return [isoparse(event["createdAt"]) for event in assigned_events if event and event.get("createdAt")]
 
     def __parse_createdAt(self, content) -> datetime:
         if content and content.get("createdAt"):
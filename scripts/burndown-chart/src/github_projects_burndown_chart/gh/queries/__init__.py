@@ -20,3 +20,12 @@ with open(os.path.join(__location__, "UserProjectV2.graphql")) as query:
 
 with open(os.path.join(__location__, "ProjectIterationsQuery.graphql")) as query:
     ProjectIterationsQuery = query.read()
+
+with open(os.path.join(__location__, "ContentAssignedEvents.graphql")) as query:
+    ContentAssignedEvents = query.read()
+
+with open(os.path.join(__location__, "ContentLabels.graphql")) as query:
+    ContentLabels = query.read()
+
+with open(os.path.join(__location__, "ContentAssignees.graphql")) as query:
+    ContentAssignees = query.read()
@@ -0,0 +1,173 @@
+"""
+Stale-while-revalidate support for the response cache of `gh.api_wrapper`:
+a cached response past its day may still be served, while the project it
+belongs to is fetched again in the background for the next run.
+
+Run as `python -m gh.revalidate REQUESTS_FILE` to refresh the projects a
+finished CLI run left behind, detached from that run.
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Background threads refreshing stale projects in one process
+REVALIDATE_WORKERS = 4
+
+# The directory holding the `gh` package, from which the detached refresh runs
+_SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class StalenessScope:
+    """
+    How stale a cached response may be while one project is fetched, and the
+    fetch times of the stale responses that were served.
+    """
+
+    max_staleness: Optional[float]
+    served_stale: List[float] = field(default_factory=list)
+
+    @property
+    def data_as_of(self) -> Optional[float]:
+        return min(self.served_stale) if self.served_stale else None
+
+
+_scope: contextvars.ContextVar = contextvars.ContextVar("staleness_scope", default=None)
+
+
+@contextmanager
+def staleness_scope(max_staleness: Optional[float]):
+    """Sets the maximum staleness, in seconds, for the queries made inside."""
+    scope = StalenessScope(max_staleness)
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def current_scope() -> Optional[StalenessScope]:
+    return _scope.get()
+
+
+def submit(pool, fn, *args):
+    """`pool.submit`, running `fn` in the caller's staleness scope."""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+class Revalidator:
+    """
+    Runs the refreshes of projects that were served stale on a few daemon
+    threads, one refresh per key at a time. A request is whatever `refresh`
+    takes, and must be JSON serializable: `detach` hands the requests still
+    pending over to a separate process, so that a CLI run can exit without
+    waiting for them. A CLI run calls `defer` first, so that none of them is
+    left half done by threads that die with it.
+    """
+
+    def __init__(self, refresh: Callable[[Any], None]):
+        self.__refresh = refresh
+        self.__lock = threading.Lock()
+        self.__queue: "queue.Queue[str]" = queue.Queue()
+        self.__pending: Dict[str, Any] = {}
+        self.__workers: List[threading.Thread] = []
+        self.__detached = False
+
+    def submit(self, key: str, request: Any):
+        with self.__lock:
+            if key in self.__pending:
+                return
+            self.__pending[key] = request
+            if self.__detached:
+                return
+            if len(self.__workers) < REVALIDATE_WORKERS:
+                worker = threading.Thread(target=self.__work, daemon=True)
+                worker.start()
+                self.__workers.append(worker)
+        self.__queue.put(key)
+
+    def __work(self):
+        while True:
+            key = self.__queue.get()
+            with self.__lock:
+                request = None if self.__detached else self.__pending.get(key)
+            if request is None:
+                continue
+            try:
+                self.__refresh(request)
+            except Exception as e:
+                logger.warning(f"Background refresh failed: {e}")
+            with self.__lock:
+                self.__pending.pop(key, None)
+
+    def defer(self):
+        """Keeps the requests submitted from now on for `detach`, starting no threads."""
+        with self.__lock:
+            self.__detached = True
+
+    def detach(self) -> int:
+        """
+        Refreshes the pending requests in a detached process instead. Returns
+        how many were handed over.
+        """
+        with self.__lock:
+            self.__detached = True
+            requests_ = list(self.__pending.values())
+            self.__pending.clear()
+        if not requests_:
+            return 0
+
+        # Holds access tokens, so it is only readable by the current user
+        fd, path = tempfile.mkstemp(suffix=".revalidate.json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(requests_, f)
+
+        options = (
+            {"start_new_session": True}
+            if os.name == "posix"
+            else {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        )
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [_SOURCE_ROOT, env.get("PYTHONPATH")]))
+        subprocess.Popen(
+            [sys.executable, "-m", "gh.revalidate", path],
+            cwd=_SOURCE_ROOT,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **options,
+        )
+        return len(requests_)
+
+
+def main(path: str):
+    from gh.api_wrapper import revalidate_project
+
+    def refresh(request):
+        try:
+            revalidate_project(request)
+        except Exception as e:
+            logger.warning(f"Background refresh failed: {e}")
+
+    with open(path, "r") as f:
+        requests_ = json.load(f)
+    os.remove(path)
+    with ThreadPoolExecutor(max_workers=REVALIDATE_WORKERS) as pool:
+        list(pool.map(refresh, requests_))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
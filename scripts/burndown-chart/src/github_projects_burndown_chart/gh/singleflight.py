@@ -0,0 +1,52 @@
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd: int):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def single_flight(path: str, timeout: float = 60.0, poll_interval: float = 0.05):
+    """
+    Exclusive cross-process lock on `<path>.lock`, used so that only one
+    process fetches the response cached at `path` while the others wait for
+    it. Yields True once the lock is held, or False if `timeout` seconds
+    passed first (a timeout of 0 only tries once).
+    """
+    fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        acquired = _try_lock(fd)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            acquired = _try_lock(fd)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                _unlock(fd)
+    finally:
+        os.close(fd)
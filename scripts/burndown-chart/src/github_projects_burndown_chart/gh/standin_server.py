@@ -0,0 +1,545 @@
+"""
+A local stand-in for GitHub's GraphQL endpoint.
+
+Answers the Project V2 item and iteration queries this tool sends (including
+batched, aliased documents) from synthetic projects of any size, so fetch
+throughput, caching and retries can be exercised without touching GitHub.
+Point the tool at it with `"github_api_url": "http://127.0.0.1:8765/graphql"`
+in `secrets.json`.
+
+    python -m gh.standin_server --items 5000 --latency 0.2 --error-rate 0.05
+"""
+
+import argparse
+import base64
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from gh.batch import split_root_fields
+
+_ROOT_FIELD = re.compile(r"^\s*(?:(?P<alias>\w+)\s*:\s*)?(?P<name>\w+)")
+_COMMENT = re.compile(r"#[^\n]*")
+_OPERATION_BODY = re.compile(r"^\s*query\b[^{]*\{", re.S)
+
+STATUS_OPTIONS = ["Todo", "In Progress", "Done"]
+RATE_LIMIT_WINDOW = timedelta(hours=1)
+
+
+def _encode_cursor(index: int) -> str:
+    return base64.b64encode(f"cursor:{index}".encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    return int(base64.b64decode(cursor).decode().split(":")[1])
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SyntheticProject:
+    """A deterministic, randomly generated Project V2 board."""
+
+    def __init__(self, number: int, size: int, start: datetime, days: int):
+        rng = random.Random(number)
+        self.number = number
+        self.title = f"Synthetic Project {number}"
+        self.start = start
+        self.days = days
+        self.items: List[Dict[str, Any]] = []
+        for k in range(size):
+            created = start + timedelta(minutes=rng.randrange(days * 24 * 60))
+            status = rng.choice(STATUS_OPTIONS + [None])
+            assignments = [
+                created + timedelta(hours=rng.randrange(1, 72) * (n + 1))
+                for n in range(rng.choice([0, 1, 1, 1, 2, 3, 8, 30]))
+            ]
+            closed = None
+            if status == "Done":
+                closed = created + timedelta(hours=rng.randrange(1, 24 * 14))
+            content_type = rng.choice(["Issue", "Issue", "Issue", "PullRequest"])
+            self.items.append(
+                {
+                    "id": f"PVTI_{number}_{k}",
+                    "status": status,
+                    "estimate": rng.choice([None, 1, 2, 3, 5, 8]),
+                    "sprint": f"Sprint {(created - start).days // 14 + 1}",
+                    "content": {
+                        "__typename": content_type,
+                        "id": f"{content_type[0]}_{number}_{k}",
+                        "title": f"{content_type} {k}",
+                        "createdAt": _iso(created),
+                        "closedAt": _iso(closed) if closed else None,
+                        "assignedAt": [_iso(at) for at in assignments],
+                        "labels": rng.sample(
+                            ["bug", "feature", "docs", "frontend", "backend"],
+                            rng.randrange(0, 3),
+                        ),
+                        "assignees": rng.sample(
+                            ["alice", "bob", "carol", "dave"],
+                            min(len(assignments), rng.randrange(0, 3)),
+                        ),
+                    },
+                }
+            )
+
+    def iterations(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": f"IT_{self.number}_{n}",
+                "title": f"Sprint {n + 1}",
+                "startDate": (self.start + timedelta(days=14 * n)).strftime("%Y-%m-%d"),
+                "duration": 14,
+            }
+            for n in range((self.days + 13) // 14)
+        ]
+
+
+def _render_item(item: Dict[str, Any], selection: str, variables: dict) -> Dict[str, Any]:
+    return {
+        "id": item["id"],
+        "fieldValueByName": {"name": item["status"]} if item["status"] else None,
+        "estimateField": (
+            {"number": item["estimate"]} if item["estimate"] is not None else None
+        ),
+        "sprintField": {"title": item["sprint"]},
+        "content": _render_content(item["content"], selection, variables),
+        **({"isArchived": item.get("archived", False)} if "isArchived" in selection else {}),
+    }
+
+
+def _render_node(node: Optional[Dict[str, Any]], selection: str, variables: dict):
+    """Renders a project item, or the issue or pull request of one."""
+    if node is None:
+        return None
+    if "content" in node:
+        return _render_item(node, selection, variables)
+    return _render_content(node, selection, variables)
+
+
+def _render_content(content: Dict[str, Any], selection: str, variables: dict) -> Dict[str, Any]:
+    rendered = {
+        "__typename": content["__typename"],
+        "id": content["id"],
+        "title": content["title"],
+        "createdAt": content["createdAt"],
+        "closedAt": content["closedAt"],
+    }
+    if "assignees(" in selection:
+        rendered["assignees"] = _render_connection(
+            [{"login": login} for login in content["assignees"]],
+            _arguments(selection, "assignees", variables),
+        )
+    if "timelineItems(" in selection:
+        rendered["timelineItems"] = _render_connection(
+            [{"__typename": "AssignedEvent", "createdAt": at} for at in content["assignedAt"]],
+            _arguments(selection, "timelineItems", variables),
+        )
+    if "labels(" in selection:
+        rendered["labels"] = _render_connection(
+            [{"name": label} for label in content["labels"]],
+            _arguments(selection, "labels", variables),
+        )
+    return rendered
+
+
+def _render_connection(nodes: List[Dict[str, Any]], arguments: Dict[str, Any]) -> Dict[str, Any]:
+    start = _decode_cursor(arguments.get("after"))
+    end = min(start + (arguments.get("first") or 100), len(nodes))
+    return {
+        "pageInfo": {"hasNextPage": end < len(nodes), "endCursor": _encode_cursor(end)},
+        "nodes": nodes[start:end],
+    }
+
+
+def _arguments(selection: str, field: str, variables: dict) -> Dict[str, Any]:
+    match = re.search(rf"\b{field}\(([^)]*)\)", selection)
+    if not match:
+        return {}
+    arguments = {}
+    for name, value in re.findall(r"(\w+)\s*:\s*(\$\w+|\"[^\"]*\"|-?\d+|\w+)", match.group(1)):
+        if value.startswith("$"):
+            arguments[name] = variables.get(value[1:])
+        elif value.startswith('"'):
+            arguments[name] = value[1:-1]
+        elif value.lstrip("-").isdigit():
+            arguments[name] = int(value)
+        else:
+            arguments[name] = None if value == "null" else value
+    return arguments
+
+
+def _filter_items(items: List[Dict[str, Any]], query: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Leaves out archived items, like GitHub, and applies the `status:"Name"`
+    and `no:status` qualifiers of an `items(query:)` filter.
+    """
+    items = [item for item in items if not item.get("archived")]
+    if not query:
+        return items
+    if query.strip() == "no:status":
+        return [item for item in items if item["status"] is None]
+    match = re.fullmatch(r'\s*status:(?:"((?:[^"\\]|\\.)*)"|(\S+))\s*', query)
+    if not match:
+        return items
+    status = re.sub(r"\\(.)", r"\1", match.group(1)) if match.group(1) is not None else match.group(2)
+    return [item for item in items if item["status"] == status]
+
+
+def _not_found(path: List[Any], type_name: str) -> Dict[str, Any]:
+    """The error GitHub reports next to a null field whose object does not exist."""
+    return {
+        "type": "NOT_FOUND",
+        "path": path,
+        "message": f"Could not resolve to a {type_name}.",
+    }
+
+
+class StandInState:
+    """Synthetic data plus the counters and rate-limit budgets of one server."""
+
+    def __init__(
+        self,
+        items: int = 1000,
+        sizes: Optional[Dict[int, int]] = None,
+        start: datetime = datetime(2026, 1, 12, tzinfo=timezone.utc),
+        days: int = 84,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        secondary_rate: float = 0.0,
+        rate_limit: int = 5000,
+        tokens: Optional[List[str]] = None,
+        seed: int = 0,
+    ):
+        self.items = items
+        self.sizes = sizes or {}
+        self.start = start
+        self.days = days
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.secondary_rate = secondary_rate
+        self.rate_limit = rate_limit
+        self.tokens = tokens
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.projects: Dict[Tuple[str, int], SyntheticProject] = {}
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.budgets: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {
+            "requests": 0,
+            "queries": 0,
+            "ok": 0,
+            "bad_gateway": 0,
+            "secondary_rate_limited": 0,
+            "rate_limited": 0,
+            "unauthorized": 0,
+        }
+
+    def project(self, owner: str, number: int) -> SyntheticProject:
+        with self.lock:
+            key = (owner, number)
+            if key not in self.projects:
+                size = self.sizes.get(number, self.items)
+                self.projects[key] = SyntheticProject(number, size, self.start, self.days)
+                for item in self.projects[key].items:
+                    self.nodes[item["id"]] = item
+                    self.nodes[item["content"]["id"]] = item["content"]
+            return self.projects[key]
+
+    def node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        # Boards only depend on their number, so an id can be resolved before
+        # its board was requested, e.g. right after a restart
+        match = re.match(r"(?:PVTI|I|P)_(\d+)_\d+$", node_id or "")
+        if match and node_id not in self.nodes:
+            self.project("", int(match.group(1)))
+        with self.lock:
+            return self.nodes.get(node_id)
+
+    def count(self, counter: str, amount: int = 1):
+        with self.lock:
+            self.counters[counter] += amount
+
+    def charge(self, token: str, cost: int) -> Optional[Dict[str, Any]]:
+        """
+        Charges `cost` points to the token's hourly budget. Returns the budget
+        after charging, or None if the token does not have enough points left.
+        """
+        now = datetime.now(timezone.utc)
+        with self.lock:
+            budget = self.budgets.get(token)
+            if budget is None or budget["resetAt"] <= now:
+                budget = {"used": 0, "resetAt": now + RATE_LIMIT_WINDOW}
+                self.budgets[token] = budget
+            if budget["used"] + cost > self.rate_limit:
+                return None
+            budget["used"] += cost
+            return dict(budget)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.counters,
+                "tokens": {
+                    token[-4:]: {"used": budget["used"], "resetAt": _iso(budget["resetAt"])}
+                    for token, budget in self.budgets.items()
+                },
+            }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    state: StandInState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self.__send(200, self.state.stats())
+        else:
+            self.__send(404, {"message": "Not Found"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") == "/reset":
+            with self.state.lock:
+                for counter in self.state.counters:
+                    self.state.counters[counter] = 0
+                self.state.budgets.clear()
+            self.__send(200, self.state.stats())
+            return
+
+        state = self.state
+        state.count("requests")
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if state.latency or state.jitter:
+            time.sleep(max(0.0, state.latency + state.random.uniform(-state.jitter, state.jitter)))
+
+        token = (self.headers.get("Authorization") or "").partition(" ")[2]
+        if state.tokens is not None and token not in state.tokens:
+            state.count("unauthorized")
+            self.__send(401, {"message": "Bad credentials"})
+            return
+
+        roll = state.random.random()
+        if roll < state.error_rate:
+            state.count("bad_gateway")
+            self.__send_raw(502, b"<html><body>502 Bad Gateway</body></html>", "text/html")
+            return
+        if roll < state.error_rate + state.secondary_rate:
+            state.count("secondary_rate_limited")
+            self.__send(
+                403,
+                {"message": "You have exceeded a secondary rate limit. Please wait a few minutes before you try again."},
+                {"Retry-After": "1"},
+            )
+            return
+
+        query = _COMMENT.sub("", payload.get("query", ""))
+        variables = payload.get("variables") or {}
+        body = _OPERATION_BODY.match(query)
+        selections = split_root_fields(query[body.end() : query.rstrip().rindex("}")]) if body else []
+
+        data_fields = [s for s in selections if _ROOT_FIELD.match(s).group("name") != "rateLimit"]
+        cost = max(1, len(data_fields))
+        budget = state.charge(token, cost)
+        if budget is None:
+            state.count("rate_limited")
+            self.__send(
+                200,
+                {
+                    "data": None,
+                    "errors": [
+                        {
+                            "type": "RATE_LIMITED",
+                            "message": "API rate limit exceeded for user.",
+                        }
+                    ],
+                },
+                {"X-RateLimit-Reset": str(int(state.budgets[token]["resetAt"].timestamp()))},
+            )
+            return
+
+        state.count("queries", len(data_fields))
+        data, errors = {}, []
+        for selection in selections:
+            root = _ROOT_FIELD.match(selection)
+            key = root.group("alias") or root.group("name")
+            if root.group("name") == "rateLimit":
+                data[key] = {
+                    "limit": state.rate_limit,
+                    "cost": cost,
+                    "used": budget["used"],
+                    "remaining": state.rate_limit - budget["used"],
+                    "resetAt": _iso(budget["resetAt"]),
+                }
+            elif root.group("name") == "nodes":
+                ids = _arguments(selection, "nodes", variables).get("ids") or []
+                data[key] = [_render_node(state.node(i), selection, variables) for i in ids]
+                errors.extend(
+                    _not_found([key, index], "node")
+                    for index, node in enumerate(data[key])
+                    if node is None
+                )
+            elif root.group("name") == "node":
+                node_id = _arguments(selection, "node", variables).get("id")
+                data[key] = _render_node(state.node(node_id), selection, variables)
+                if data[key] is None:
+                    errors.append(_not_found([key], "node"))
+            else:
+                data[key] = self.__resolve_owner(root.group("name"), selection, variables)
+                if data[key] and data[key].get("projectV2") is None:
+                    errors.append(_not_found([key, "projectV2"], "ProjectV2"))
+        state.count("ok")
+        self.__send(200, {"data": data, "errors": errors} if errors else {"data": data})
+
+    def __resolve_owner(self, name: str, selection: str, variables: dict):
+        if name == "repository":
+            owner_args = _arguments(selection, "repository", variables)
+            owner = f"{owner_args.get('owner')}/{owner_args.get('name')}"
+        elif name in ("user", "organization"):
+            owner = _arguments(selection, name, variables).get("login")
+        else:
+            return None
+
+        number = _arguments(selection, "projectV2", variables).get("number")
+        if number is None or number < 1:
+            return {"projectV2": None}
+        project = self.state.project(owner, number)
+
+        project_data: Dict[str, Any] = {"title": project.title}
+        if 'field(name: "Sprint")' in selection:
+            project_data["field"] = {
+                "id": f"F_{number}",
+                "name": "Sprint",
+                "configuration": {
+                    "duration": 14,
+                    "startDay": 1,
+                    "completedIterations": [],
+                    "iterations": project.iterations(),
+                },
+            }
+        else:
+            project_data["field"] = {"options": [{"name": o} for o in STATUS_OPTIONS]}
+
+        if "items(" in selection:
+            item_args = _arguments(selection, "items", variables)
+            items = _filter_items(project.items, item_args.get("query"))
+            start = _decode_cursor(item_args.get("after"))
+            end = min(start + (item_args.get("first") or 100), len(items))
+            if item_args.get("last"):
+                start, end = max(0, len(items) - item_args["last"]), len(items)
+            item_selection = selection[selection.index("items(") :]
+            project_data["items"] = {
+                "totalCount": len(items),
+                "pageInfo": {
+                    "hasNextPage": end < len(items),
+                    "endCursor": _encode_cursor(end),
+                },
+                "nodes": [_render_item(item, item_selection, variables) for item in items[start:end]],
+            }
+        return {"projectV2": project_data}
+
+    def __send(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+        self.__send_raw(status, json.dumps(body).encode(), "application/json", headers)
+
+    def __send_raw(self, status: int, body: bytes, content_type: str, headers: Dict[str, str] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, **options) -> ThreadingHTTPServer:
+    """
+    Starts a stand-in server on a background thread and returns it. The bound
+    address is `server.server_address`; `server.state` holds its counters.
+    Call `server.shutdown()` when done.
+    """
+    server = make_server(host, port, StandInState(**options))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_server(host: str, port: int, state: StandInState) -> ThreadingHTTPServer:
+    handler = type("BoundStandInHandler", (StandInHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.state = state
+    return server
+
+
+def parse_cli_args():
+    parser = argparse.ArgumentParser(
+        description="Serve a local stand-in for GitHub's GraphQL API."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--items", type=int, default=1000, help="Items in every synthetic project."
+    )
+    parser.add_argument(
+        "--size",
+        action="append",
+        default=[],
+        metavar="NUMBER=ITEMS",
+        help="Overrides the item count of one project number. Repeatable.",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to every response."
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Random +/- seconds on the latency."
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of requests answered with a 502."
+    )
+    parser.add_argument(
+        "--secondary-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests answered with a secondary rate limit 403.",
+    )
+    parser.add_argument(
+        "--rate-limit", type=int, default=5000, help="Points per token per hour."
+    )
+    parser.add_argument(
+        "--tokens",
+        help="Comma separated list of accepted tokens. Accepts any token if omitted.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_cli_args()
+    state = StandInState(
+        items=args.items,
+        sizes=dict(tuple(map(int, size.split("="))) for size in args.size),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        secondary_rate=args.secondary_rate,
+        rate_limit=args.rate_limit,
+        tokens=args.tokens.split(",") if args.tokens else None,
+        seed=args.seed,
+    )
+    server = make_server(args.host, args.port, state)
+    print(f"Serving GitHub GraphQL stand-in on http://{args.host}:{args.port}/graphql")
+    print(f"Request counters on http://{args.host}:{args.port}/stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
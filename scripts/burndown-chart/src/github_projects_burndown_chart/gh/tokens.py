@@ -0,0 +1,111 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+from dateutil.parser import isoparse
+
+# GitHub's hourly GraphQL budget of a personal access token
+DEFAULT_RATE_LIMIT = 5000
+
+# Points left untouched on every token, so the last requests of a window do
+# not fail half-way through a paginated fetch
+DEFAULT_RESERVE = 100
+
+# Root field appended to every request to learn the budget of its token
+RATE_LIMIT_ALIAS = "token_rate_limit"
+RATE_LIMIT_FIELD = f"{RATE_LIMIT_ALIAS}: rateLimit {{ limit cost remaining resetAt }}"
+
+
+def with_rate_limit(query: str) -> str:
+    """Appends the `rateLimit` root field to a single-operation query."""
+    end = query.rstrip().rindex("}")
+    return f"{query[:end]}  {RATE_LIMIT_FIELD}\n}}"
+
+
+@dataclass
+class TokenBudget:
+    token: str
+    reserve: int = DEFAULT_RESERVE
+    limit: int = DEFAULT_RATE_LIMIT
+    remaining: int = DEFAULT_RATE_LIMIT
+    reset_at: float = 0.0
+    # The cost of the last request, used as the estimate for the next one
+    cost: int = 1
+
+    @property
+    def headroom(self) -> int:
+        if self.reset_at and self.reset_at <= time.time():
+            return self.limit - self.reserve
+        return self.remaining - self.reserve
+
+
+class TokenPool:
+    """
+    The hourly GraphQL budgets of several access tokens. Each request is sent
+    with the token that has the most points left, and the estimated cost of
+    requests in flight is deducted up front, so that concurrent requests
+    spread over the tokens instead of all picking the same one. The budgets
+    are corrected from the `rateLimit` field of every response.
+
+    Tokens are given as strings or as `{"token": ..., "reserve": ...}`.
+    """
+
+    def __init__(self, tokens: List[Union[str, Dict]]):
+        self.__lock = threading.Lock()
+        self.__budgets: List[TokenBudget] = []
+        for token in tokens:
+            if isinstance(token, dict):
+                budget = TokenBudget(token["token"], token.get("reserve", DEFAULT_RESERVE))
+            else:
+                budget = TokenBudget(token)
+            self.__budgets.append(budget)
+
+    def __len__(self):
+        return len(self.__budgets)
+
+    def acquire(self) -> Optional[str]:
+        """
+        Picks the token with the most headroom and reserves its estimated
+        cost. Waits for the earliest reset if every token is used up.
+        """
+        if not self.__budgets:
+            return None
+        while True:
+            with self.__lock:
+                budget = max(self.__budgets, key=lambda b: b.headroom)
+                if budget.headroom >= budget.cost:
+                    if budget.reset_at and budget.reset_at <= time.time():
+                        budget.remaining, budget.reset_at = budget.limit, 0.0
+                    budget.remaining -= budget.cost
+                    return budget.token
+                wait = min(b.reset_at for b in self.__budgets) - time.time()
+            time.sleep(max(1.0, wait))
+
+    def update(self, token: str, rate_limit: Dict):
+        """Records the budget reported by a response sent with `token`."""
+        budget = self.__budget(token)
+        reset_at = isoparse(rate_limit["resetAt"]).timestamp()
+        with self.__lock:
+            budget.limit = rate_limit["limit"]
+            budget.cost = max(1, rate_limit["cost"])
+            if reset_at > budget.reset_at:
+                # A new window started
+                budget.remaining, budget.reset_at = rate_limit["remaining"], reset_at
+            else:
+                # Responses of concurrent requests arrive in any order
+                budget.remaining = min(budget.remaining, rate_limit["remaining"])
+
+    def exhaust(self, token: str, reset_at: Optional[float] = None):
+        """Marks a token as used up, e.g. after a RATE_LIMITED error."""
+        budget = self.__budget(token)
+        with self.__lock:
+            budget.remaining = 0
+            budget.reset_at = max(budget.reset_at, reset_at or time.time() + 60.0)
+
+    def has_headroom(self) -> bool:
+        with self.__lock:
+            return any(b.headroom >= b.cost for b in self.__budgets)
+
+    def __budget(self, token: str) -> TokenBudget:
+        return next(b for b in self.__budgets if b.token == token)
@@ -1,27 +1,28 @@
 import argparse
-from datetime import datetime, timezone
+import functools
+import os
 import sys
 
-from chart.burndown import BurndownChart, BurndownChartData, BurndownChartDataSeries
-from config import config
+from api import prepare_chart_data, prepare_portfolio_data, project_stats
+from chart.data import BurndownChartData
+from chart.export import EXPORT_FORMATS, write_data
+from config import Config
+from gh.api_wrapper import defer_revalidation, detach_revalidation
 from discord import webhook
-from gh.api_wrapper import (
-    get_organization_project,
-    get_repository_project,
-    get_project_v2,
-    get_sprint_dates,
-)
-from gh.project import Project
-from util import colors
-from util.dates import date_range
-from util.stats import ProjectStats
-from util.calculators import (
-    ClosedPointsCalculator,
-    AssignedPointsCalculator,
-    CreatedPointsCalculator,
-    TaigaPointsCalculator,
-    BurndownCalculator,
-)
+from util.dates import parse_as_of
+from util.groups import GROUP_KEYS
+
+
+PROJECT_TYPES = ["repository", "organization", "user"]
+
+
+def portfolio_entry(value: str):
+    project_type, _, name = value.partition("/")
+    if project_type not in PROJECT_TYPES or not name:
+        raise argparse.ArgumentTypeError(
+            f"'{value}' is not TYPE/NAME with TYPE one of {PROJECT_TYPES}"
+        )
+    return project_type, name
 
 
 def parse_cli_args():
@@ -32,27 +33,59 @@ def parse_cli_args():
         "--type",
         "-t",
         default="user",
-        choices=["repository", "organization", "user"],
+        choices=PROJECT_TYPES,
         help="The type of project to generate a burndown chart for. Can be either 'organization' or 'repository' or 'user'.",
-        required=True,
     )
     parser.add_argument(
         "--name",
         "-n",
         help="The name of the project as it appears in the config.json",
-        required=True,
+    )
+    parser.add_argument(
+        "--portfolio",
+        "-p",
+        nargs="+",
+        type=portfolio_entry,
+        metavar="TYPE/NAME",
+        help="Charts the combined burndown of several projects from the config.json instead of --name, "
+        "e.g. user/app repository/backend.",
     )
     parser.add_argument("--sprint", "-s", help="The name of the sprint.")
+    parser.add_argument(
+        "--output",
+        "-o",
+        default="png",
+        choices=["png"] + EXPORT_FORMATS,
+        help="Render a PNG chart, or write the chart data as json, csv or ndjson without rendering.",
+    )
     parser.add_argument(
         "--filepath",
-        help="The filepath where the burndown chart is saved.",
-        default="./burndown.png",
+        help="The filepath where the burndown chart is saved. "
+        "Defaults to ./burndown.png for charts and stdout ('-') for data outputs.",
+    )
+    parser.add_argument(
+        "--group-by",
+        "-g",
+        choices=list(GROUP_KEYS),
+        help="Adds one remaining points series per label, assignee, status or content type.",
+    )
+    parser.add_argument(
+        "--as-of",
+        type=parse_as_of,
+        metavar="DATE",
+        help="Draw the chart as it looked at a past date (the end of that day, UTC) "
+        "or time, e.g. 2026-02-03 or 2026-02-03T12:00Z. Defaults to now.",
     )
     parser.add_argument(
         "--discord",
         action="store_true",
         help="If present, posts the burndown chart to the configured webhook",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Render and post the chart even if its data has not changed since the last run.",
+    )
     parser.add_argument(
         "--no-cache",
         "-nc",
@@ -60,136 +93,97 @@ def parse_cli_args():
         dest="use_cache",
         help="Force fetch fresh data from github api. Ignore previously cached results.",
     )
-    return parser.parse_args()
-
-
-def download_project_data(
-    project_type: str, project_version: int, sprint: str, use_cache: bool = True
-) -> Project:
-    if project_version == 2:
-        return get_project_v2(project_type, sprint, use_cache)
-
-    if project_type == "repository":
-        return get_repository_project(use_cache)
-    elif project_type == "organization":
-        return get_organization_project(use_cache)
-    else:
-        raise ValueError(f"Unknown project type: {project_type}")
-
-
-def get_calculator(calc_type: str, cards):
-    """Factory to instantiate the correct calculator."""
-    calculators = {
-        "closed": ClosedPointsCalculator,
-        "assigned": AssignedPointsCalculator,
-        "created": CreatedPointsCalculator,
-        "taiga": TaigaPointsCalculator,
-        "burndown": BurndownCalculator,
-    }
-
-    calculator_class = calculators.get(calc_type)
-    if calculator_class:
-        return calculator_class(cards)
-    return None
-
-
-def prepare_chart_data(stats: ProjectStats):
-    color_gen = colors()
-    series_list = []
-
-    calc_types = config["settings"].get("calculators", ["burndown"])
-    for pts_type in calc_types:
-        calculator = get_calculator(pts_type, stats.project.cards)
-        if not calculator:
-            print(f"Warning: Unknown calculator type '{pts_type}'. Skipping.")
-            continue
-
-        # Logic: If using the 'BurndownCalculator', it returns the exact remaining value.
-        # For others (like 'closed'), we assume the user wants (Total - Closed).
-        if isinstance(calculator, BurndownCalculator):
-            points_data = stats.remaining_points_by_date()
-        else:
-            # legacy behavior: Subtract calculated value from Total
-            # cumulative_data = stats.points_by_date(calculator)
-            # points_data = {
-            #     d: stats.total_points - val for d, val in cumulative_data.items()
-            # }
-            points_data = stats.points_by_date(calculator)
-
-        series_list.append(
-            BurndownChartDataSeries(
-                name=pts_type.capitalize(),
-                data=points_data,
-                format=dict(color=next(color_gen)),
-            )
-        )
+    args = parser.parse_args()
+    if not args.name and not args.portfolio:
+        parser.error("one of --name or --portfolio is required")
+    if args.discord and args.output != "png":
+        parser.error("--discord can only be used with --output png")
+    if args.filepath is None:
+        args.filepath = "./burndown.png" if args.output == "png" else "-"
+    return args
 
-    # construct the Data Object
-    points_label = config["settings"].get("points_label", "Points")
-    if not points_label:
-        points_label = "Issues"
-
-    data = BurndownChartData(
-        sprint_name=stats.project.name,
-        utc_chart_start=config.utc_sprint_start(),
-        utc_chart_end=config.utc_chart_end() or config.utc_sprint_end(),
-        utc_sprint_start=config.utc_sprint_start(),
-        utc_sprint_end=config.utc_sprint_end(),
-        total_points=stats.total_points,
-        series=series_list,
-        points_label=f"Outstanding {points_label}",
-    )
-    return data
+
+def export_chart_data(data: BurndownChartData, cards, output: str, filepath: str):
+    if filepath == "-":
+        write_data(data, cards, output, sys.stdout)
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+    with open(filepath, "w", newline="") as f:
+        write_data(data, cards, output, f)
 
 
 if __name__ == "__main__":
     args = parse_cli_args()
-    config.set_project(args.type, args.name)
-
-    start, end = get_sprint_dates(args.sprint)
-    if start and end:
-        config["settings"]["sprint_start_date"] = start
-        config["settings"]["sprint_end_date"] = end
-    else:
-        config["settings"]["sprint_start_date"] = "2026-01-12"
-        config["settings"]["sprint_end_date"] = (
-            datetime.now(timezone.utc)
-            .replace(hour=0, minute=0, second=0, microsecond=0)
-            .strftime("%Y-%m-%d")
-        )
+    # The refreshes of stale responses outlive this run in a detached process
+    defer_revalidation()
 
-    try:
-        print(f"Fetching data for {args.name}...")
-        project = download_project_data(
-            args.type, config["settings"].get("version", 2), args.sprint, args.use_cache
-        )
+    # Data outputs may be written to stdout, so progress goes to stderr.
+    log = functools.partial(print, file=sys.stdout if args.output == "png" else sys.stderr)
 
-        # Calculate Stats
-        stats = ProjectStats(
-            project,
-            config.utc_sprint_start(),
-            config.utc_chart_end() or config.utc_sprint_end(),
-        )
+    try:
+        config = Config()
+        if args.portfolio:
+            names = ", ".join(f"{t}/{n}" for t, n in args.portfolio)
+            log(f"Fetching data for {names}...")
+            chart_data, stats = prepare_portfolio_data(
+                [config.project(t, n) for t, n in args.portfolio],
+                args.sprint,
+                args.use_cache,
+                args.as_of,
+                args.group_by,
+            )
+            cards = stats.cards
+            log(f"Portfolio: {names} : {stats.total_points} total points.")
+        else:
+            log(f"Fetching data for {args.name}...")
+            stats, project_config = project_stats(
+                config.project(args.type, args.name), args.sprint, args.use_cache, args.as_of
+            )
+            cards = stats.project.cards
 
-        print(
-            f"Project: {args.name} : {args.type} : {project.total_points} total points."
-        )
-        print(f"Sprint Start: {config.utc_sprint_start()}")
-        print(f"Sprint End:   {config.utc_sprint_end()}")
+            log(
+                f"Project: {args.name} : {args.type} : {stats.total_points} total points."
+            )
+            chart_data = prepare_chart_data(stats, project_config, args.group_by)
+
+        log(f"Sprint Start: {chart_data.utc_sprint_start}")
+        log(f"Sprint End:   {chart_data.utc_sprint_end}")
+        if chart_data.as_of:
+            log(f"As of:        {chart_data.as_of}")
+        if chart_data.data_as_of:
+            log(f"Data as of:   {chart_data.data_as_of} (refreshing in the background)")
         if args.use_cache:
-            print(f"WARNING: using cached json data from system tmp directory.")
-        burndown_chart = BurndownChart(prepare_chart_data(stats))
-
-        if args.discord:
-            chart_path = "./tmp/chart.png"
-            burndown_chart.generate_chart(chart_path)
-            print(f"Posting to Discord...")
-            webhook.post_burndown_chart(chart_path)
+            log(f"WARNING: using cached json data from system tmp directory.")
+
+        if args.output != "png":
+            # Data-only mode never imports the charting stack
+            export_chart_data(chart_data, cards, args.output, args.filepath)
+            if args.filepath != "-":
+                log(f"Saved to {args.filepath}")
         else:
-            burndown_chart.generate_chart(args.filepath)
-            print(f"Saved to {args.filepath}")
-        print("Done.")
+            from chart.burndown import BurndownChart
+
+            burndown_chart = BurndownChart(chart_data)
+
+            if args.discord:
+                chart_path = "./tmp/chart.png"
+                burndown_chart.generate_chart(chart_path, args.force)
+                log(f"Posting to Discord...")
+                if not webhook.post_burndown_chart(
+                    chart_path,
+                    config.secrets["discord_webhook"],
+                    chart_data.fingerprint(),
+                    args.force,
+                ):
+                    log("Chart unchanged since the last post. Skipped posting.")
+            elif burndown_chart.generate_chart(args.filepath, args.force):
+                log(f"Saved to {args.filepath}")
+            else:
+                log(f"Chart unchanged since the last run. Kept {args.filepath}")
+        # Stale responses are refreshed after this run exits, for the next one
+        detach_revalidation()
+        log("Done.")
 
     except Exception as e:
-        print(f"Error: {e}")
+        log(f"Error: {e}")
         sys.exit(1)
@@ -2,14 +2,10 @@ from gh.project import Project
 from util.calculators import *
 
 
-def calculators(project: Project):
-    return {
-        "created": CreatedPointsCalculator(project.cards),
-        "assigned": AssignedPointsCalculator(project.cards),
-        "closed": ClosedPointsCalculator(project.cards),
-        "taiga": TaigaPointsCalculator(project.cards),
-        "burndown": BurndownCalculator(project.cards),
-    }
+def calculators(project: Project, definitions: dict = None):
+    """All registered calculators plus the custom ones from `definitions`."""
+    names = list(CALCULATORS) + list(definitions or {})
+    return {name: get_calculator(name, project.cards, definitions) for name in names}
 
 
 def colors():
@@ -1,6 +1,10 @@
 from datetime import datetime, timedelta
-from typing import List
+from typing import Any, Dict, List, Optional, Type
+
+import numpy as np
+
 from gh.project import Card
+from util.columns import CardColumns, cumulative_sum_at
 
 
 class PointsCalculator:
@@ -11,60 +15,113 @@ class PointsCalculator:
     def points_as_of(self, date: datetime):
         raise NotImplementedError()
 
+    def points_by_dates(self, dates: List[datetime]) -> List[float]:
+        return [self.points_as_of(date) for date in dates]
+
+
+class DeclarativeCalculator(PointsCalculator):
+    """
+    A calculator defined in config.json instead of code, as a weighted sum of
+    per-card terms:
+
+        "custom_calculators": {
+            "wip": {
+                "weights": {"closed": 1, "in_progress": 0.5},
+                "labels": ["backend"],
+                "status": ["In Progress", "Done"],
+                "scale": 1
+            }
+        }
+
+    Each term holds a card's points from its start event on, and the
+    `in_progress` and `remaining` terms release them again once it is closed.
+    The definition is compiled into one list of (time, points) events, so a
+    whole series is a single sort, cumulative sum and binary search per date.
+    The built-in `closed`, `assigned`, `created` and `taiga` calculators are
+    definitions of this kind as well.
+    """
 
-class ClosedPointsCalculator(PointsCalculator):
+    # Term name -> (start date column, released when closed)
+    TERMS = {
+        "created": ("created", False),
+        "assigned": ("assigned", False),
+        "closed": ("closed", False),
+        "in_progress": ("assigned", True),
+        "remaining": ("created", True),
+    }
+
+    def __init__(self, cards: List[Card], definition: Dict[str, Any]):
+        super().__init__(cards)
+        weights = definition.get("weights") or {}
+        unknown = set(weights) - set(self.TERMS)
+        if not weights or unknown:
+            raise ValueError(
+                f"Custom calculator weights must use the terms {list(self.TERMS)}, "
+                f"got {list(weights)}."
+            )
+
+        columns = CardColumns(cards)
+        included = np.ones(len(columns), dtype=bool)
+        if definition.get("labels"):
+            included &= columns.has_label(definition["labels"])
+        if definition.get("status"):
+            included &= columns.has_status(definition["status"])
+        points = np.where(included, columns.points, 0.0) * definition.get("scale", 1)
+
+        times, values = [], []
+        for term, weight in weights.items():
+            start_column, released_when_closed = self.TERMS[term]
+            start = getattr(columns, start_column)
+            times.append(start)
+            values.append(weight * points)
+            if released_when_closed:
+                # Never before the start, and never for cards without a start
+                # or close date (np.maximum propagates NaN).
+                times.append(np.maximum(start, columns.closed))
+                values.append(-weight * points)
+        self.__event_times = np.concatenate(times)
+        self.__event_values = np.concatenate(values)
 
     def points_as_of(self, date: datetime) -> float:
-        return sum(
-            card.points
-            for card in self.cards
-            if isinstance(card.closed, datetime) and card.closed <= date
-        )
+        return self.points_by_dates([date])[0]
 
+    def points_by_dates(self, dates: List[datetime]) -> List[float]:
+        query_times = np.array([date.timestamp() for date in dates], dtype=float)
+        totals = cumulative_sum_at(self.__event_times, self.__event_values, query_times)
+        return [float(total) for total in totals]
 
-class AssignedPointsCalculator(PointsCalculator):
 
-    def points_as_of(self, date: datetime) -> float:
-        return sum(
-            card.points
-            for card in self.cards
-            if isinstance(card.assigned, datetime) and card.assigned <= date
-        )
+class ClosedPointsCalculator(DeclarativeCalculator):
+    DEFINITION = {"weights": {"closed": 1}}
 
+    def __init__(self, cards: List[Card]):
+        super().__init__(cards, self.DEFINITION)
 
-class CreatedPointsCalculator(PointsCalculator):
 
-    def points_as_of(self, date: datetime) -> float:
-        return sum(
-            card.points
-            for card in self.cards
-            if isinstance(card.created, datetime) and card.created <= date
-        )
+class AssignedPointsCalculator(DeclarativeCalculator):
+    DEFINITION = {"weights": {"assigned": 1}}
 
+    def __init__(self, cards: List[Card]):
+        super().__init__(cards, self.DEFINITION)
 
-class TaigaPointsCalculator(PointsCalculator):
+
+class CreatedPointsCalculator(DeclarativeCalculator):
+    DEFINITION = {"weights": {"created": 1}}
+
+    def __init__(self, cards: List[Card]):
+        super().__init__(cards, self.DEFINITION)
+
+
+class TaigaPointsCalculator(DeclarativeCalculator):
     """
     Weighted calculation: 100% points for closed, 50% for assigned/in-progress.
     Useful for showing 'Work in Progress' value.
     """
 
-    def points_as_of(self, date: datetime) -> float:
-        closed_by_date = [
-            card
-            for card in self.cards
-            if isinstance(getattr(card, "closed"), datetime)
-            and getattr(card, "closed") <= date
-        ]
-        closed_points = sum(card.points for card in closed_by_date)
-        assigned_by_date = [
-            card
-            for card in self.cards
-            if isinstance(getattr(card, "assigned"), datetime)
-            and getattr(card, "assigned") <= date
-            and card not in closed_by_date
-        ]
-        in_progress_points = sum(card.points / 2 for card in assigned_by_date)
-        return float(closed_points + in_progress_points)
+    DEFINITION = {"weights": {"closed": 1, "in_progress": 0.5}}
+
+    def __init__(self, cards: List[Card]):
+        super().__init__(cards, self.DEFINITION)
 
 
 class BurndownCalculator(PointsCalculator):
@@ -114,3 +171,31 @@ class BurndownCalculator(PointsCalculator):
 
         days_to_complete = remaining / velocity
         return datetime.now() + timedelta(days=days_to_complete)
+
+
+CALCULATORS: Dict[str, Type[PointsCalculator]] = {
+    "closed": ClosedPointsCalculator,
+    "assigned": AssignedPointsCalculator,
+    "created": CreatedPointsCalculator,
+    "taiga": TaigaPointsCalculator,
+    "burndown": BurndownCalculator,
+}
+
+
+def register_calculator(name: str, calculator_class: Type[PointsCalculator]):
+    CALCULATORS[name] = calculator_class
+
+
+def get_calculator(
+    name: str, cards: List[Card], definitions: Optional[Dict[str, Any]] = None
+) -> Optional[PointsCalculator]:
+    """
+    Instantiates a registered calculator, or compiles the custom calculator of
+    that name from `definitions` (the `custom_calculators` setting).
+    """
+    if definitions and name in definitions:
+        return DeclarativeCalculator(cards, definitions[name])
+    calculator_class = CALCULATORS.get(name)
+    if calculator_class:
+        return calculator_class(cards)
+    return None
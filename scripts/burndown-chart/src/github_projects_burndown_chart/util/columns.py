@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from gh.project import Card
+
+
+def _timestamps(dates: Iterable[Optional[datetime]]) -> np.ndarray:
+    return np.array(
+        [d.timestamp() if isinstance(d, datetime) else np.nan for d in dates],
+        dtype=float,
+    )
+
+
+class CardColumns:
+    """
+    The cards of a project as parallel arrays, one entry per card. Dates are
+    POSIX timestamps with NaN for dates that are not set.
+    """
+
+    def __init__(self, cards: List[Card]):
+        self.cards = cards
+        self.points = np.array([card.points for card in cards], dtype=float)
+        self.created = _timestamps(card.created for card in cards)
+        self.assigned = _timestamps(card.assigned for card in cards)
+        self.closed = _timestamps(card.closed for card in cards)
+        self.status = np.array([card.status for card in cards], dtype=object)
+
+    def __len__(self):
+        return len(self.cards)
+
+    def has_label(self, labels: Iterable[str]) -> np.ndarray:
+        wanted = set(labels)
+        return np.array([bool(wanted.intersection(card.labels)) for card in self.cards], dtype=bool)
+
+    def has_status(self, statuses: Iterable[Optional[str]]) -> np.ndarray:
+        wanted = set(statuses)
+        return np.array([status in wanted for status in self.status], dtype=bool)
+
+
+def cumulative_sum_at(
+    event_times: np.ndarray, event_values: np.ndarray, query_times: np.ndarray
+) -> np.ndarray:
+    """
+    For each query time, the sum of the values of all events at or before it.
+    Events at NaN times never happen. Sorts the events once and answers every
+    query with a binary search into their running total.
+    """
+    happens = ~np.isnan(event_times)
+    order = np.argsort(event_times[happens], kind="stable")
+    times = event_times[happens][order]
+    totals = np.concatenate(([0.0], np.cumsum(event_values[happens][order])))
+    return totals[np.searchsorted(times, query_times, side="right")]
@@ -1,3 +1,4 @@
+import re
 from datetime import datetime, timedelta, timezone
 from dateutil import parser
 from typing import List
@@ -37,6 +38,16 @@ def date_range(start_date: datetime, end_date: datetime) -> List[datetime]:
     return [start + timedelta(days=x) for x in range(num_days)]
 
 
-TODAY_UTC: datetime = datetime.now(timezone.utc).replace(
-    hour=0, minute=0, second=0, microsecond=0
-)
+def end_of_day(date: datetime) -> datetime:
+    return date.replace(hour=23, minute=59, second=59, microsecond=0)
+
+
+def parse_as_of(value: str) -> datetime:
+    """
+    Parse the instant a chart is drawn as of. A bare date (YYYY-MM-DD) means
+    the end of that day in UTC, so the whole day is included.
+    """
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", value.strip()):
+        day = datetime.strptime(value.strip(), "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        return end_of_day(day)
+    return parse_to_utc(value)
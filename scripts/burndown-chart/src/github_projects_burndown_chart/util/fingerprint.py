@@ -0,0 +1,25 @@
+import os
+from typing import Optional
+
+
+def fingerprint_path(path: str) -> str:
+    """The sidecar file holding the fingerprint of what was written to `path`."""
+    return f"{path}.fingerprint"
+
+
+def read_fingerprint(path: str) -> Optional[str]:
+    try:
+        with open(fingerprint_path(path), "r") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def is_unchanged(path: str, fingerprint: str) -> bool:
+    """True if `path` exists and was last written from data with this fingerprint."""
+    return os.path.exists(path) and read_fingerprint(path) == fingerprint
+
+
+def save_fingerprint(path: str, fingerprint: str):
+    with open(fingerprint_path(path), "w") as f:
+        f.write(fingerprint)
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from gh.project import Card
+
+NO_GROUP = "(none)"
+
+# How each group-by key buckets a card. A card may fall into several groups
+# (e.g. one per label); cards without a value fall into NO_GROUP.
+GROUP_KEYS: Dict[str, Callable[[Card], List[Optional[str]]]] = {
+    "label": lambda card: card.labels,
+    "assignee": lambda card: card.assignees,
+    "status": lambda card: [card.status],
+    "type": lambda card: [card.content_type],
+}
+
+
+@dataclass
+class GroupSeries:
+    remaining: Dict[datetime, Optional[float]]
+    closed: Dict[datetime, float]
+
+
+def grouped_points_by_date(
+    cards: Iterable[Card],
+    dates: List[datetime],
+    group_by: str,
+    cutoff: Optional[datetime] = None,
+) -> Dict[str, GroupSeries]:
+    """
+    Computes the remaining (created - closed) and closed points per day for
+    every group at once.
+
+    Every card contributes one `created` and one `closed` event per group it
+    belongs to. The events are binned into days with a single binary search
+    against the sorted end-of-day timestamps and accumulated per group with
+    one cumulative sum over a (groups x days) matrix, so the cost grows with
+    cards + groups x days rather than cards x groups x days. Events after
+    `cutoff` are ignored and remaining points after it are None, like
+    `ProjectStats.remaining_points_by_date`.
+    """
+    if group_by not in GROUP_KEYS:
+        raise ValueError(
+            f"Unknown group-by key '{group_by}'. Options: {list(GROUP_KEYS)}"
+        )
+    key = GROUP_KEYS[group_by]
+
+    group_index: Dict[str, int] = {}
+    event_groups, event_times, event_points, event_closes = [], [], [], []
+    for card in cards:
+        groups = [g if g else NO_GROUP for g in key(card)] or [NO_GROUP]
+        for group in dict.fromkeys(groups):
+            index = group_index.setdefault(group, len(group_index))
+            for timestamp, is_close in ((card.created, False), (card.closed, True)):
+                if isinstance(timestamp, datetime):
+                    event_groups.append(index)
+                    event_times.append(timestamp.timestamp())
+                    event_points.append(card.points)
+                    event_closes.append(is_close)
+
+    day_ends = np.array(
+        [d.replace(hour=23, minute=59, second=59).timestamp() for d in dates]
+    )
+    # An event counts towards the first day whose end is at or after it
+    times = np.array(event_times, dtype=float)
+    days = np.searchsorted(day_ends, times, side="left")
+    in_range = days < len(dates)
+    if cutoff is not None:
+        in_range &= times <= cutoff.timestamp()
+
+    groups = np.array(event_groups, dtype=int)[in_range]
+    days = days[in_range]
+    points = np.array(event_points, dtype=float)[in_range]
+    closes = np.array(event_closes, dtype=bool)[in_range]
+
+    created = np.zeros((len(group_index), len(dates)))
+    closed = np.zeros((len(group_index), len(dates)))
+    np.add.at(created, (groups[~closes], days[~closes]), points[~closes])
+    np.add.at(closed, (groups[closes], days[closes]), points[closes])
+    created = np.cumsum(created, axis=1)
+    closed = np.cumsum(closed, axis=1)
+    remaining = created - closed
+
+    plotted = [cutoff is None or date <= cutoff for date in dates]
+    return {
+        group: GroupSeries(
+            remaining={
+                date: float(remaining[index, d]) if plotted[d] else None
+                for d, date in enumerate(dates)
+            },
+            closed={date: float(closed[index, d]) for d, date in enumerate(dates)},
+        )
+        for group, index in sorted(group_index.items())
+    }
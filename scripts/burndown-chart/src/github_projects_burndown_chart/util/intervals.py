@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Union
+
+import numpy as np
+
+from gh.project import Card
+from util.columns import CardColumns
+
+Times = Union[float, np.ndarray]
+
+
+class IntervalIndex:
+    """
+    Weighted [start, end) intervals, indexed to answer which of them are open
+    at a given instant. Start and end times are kept in two sorted arrays with
+    running totals of their weights, so the number and weight of the open
+    intervals at any time are two binary searches: O(log n) per query after an
+    O(n log n) build, and one vectorised search for many instants at once.
+
+    Times are POSIX timestamps. Intervals with a NaN start never open, and
+    intervals with a NaN end never close. An end before its start is moved to
+    the start, so such an interval is never open.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, weights: np.ndarray):
+        opens = ~np.isnan(starts)
+        starts, ends, weights = starts[opens], ends[opens], weights[opens]
+        # np.maximum propagates NaN, so intervals that never close stay open
+        ends = np.maximum(starts, ends)
+        closes = ~np.isnan(ends)
+
+        self.__starts, self.__started = self.__sorted(starts, weights)
+        self.__ends, self.__ended = self.__sorted(ends[closes], weights[closes])
+
+    @staticmethod
+    def __sorted(times: np.ndarray, weights: np.ndarray):
+        order = np.argsort(times, kind="stable")
+        return times[order], np.concatenate(([0.0], np.cumsum(weights[order])))
+
+    def __len__(self):
+        return len(self.__starts)
+
+    def started(self, times: Times) -> Times:
+        """The number of intervals started at or before each time."""
+        return np.searchsorted(self.__starts, times, side="right")
+
+    def started_weight(self, times: Times) -> Times:
+        """The weight of the intervals started at or before each time."""
+        return self.__started[self.started(times)]
+
+    def open(self, times: Times) -> Times:
+        """The number of intervals open at each time."""
+        return self.started(times) - np.searchsorted(self.__ends, times, side="right")
+
+    def open_weight(self, times: Times) -> Times:
+        """The weight of the intervals open at each time."""
+        ended = np.searchsorted(self.__ends, times, side="right")
+        return self.__started[self.started(times)] - self.__ended[ended]
+
+
+@dataclass
+class ProjectSnapshot:
+    """The state of a project's cards at one instant."""
+
+    as_of: datetime
+    # Points of the cards created by then, closed or not
+    scope_points: float
+    # Cards created and not yet closed, and their points
+    open_cards: int
+    remaining_points: float
+    # Cards assigned and not yet closed, and their points
+    wip_cards: int
+    wip_points: float
+
+
+class CardIntervals:
+    """
+    The lifetimes of a project's cards: created to closed (the open scope)
+    and assigned to closed (the work in progress), weighted by points. Built
+    once per project, it answers what the project looked like at any past
+    instant without rescanning the cards.
+    """
+
+    def __init__(self, cards: List[Card]):
+        columns = CardColumns(cards)
+        self.scope = IntervalIndex(columns.created, columns.closed, columns.points)
+        self.wip = IntervalIndex(columns.assigned, columns.closed, columns.points)
+
+    def remaining_points(self, times: Times) -> Times:
+        return self.scope.open_weight(times)
+
+    def snapshot(self, as_of: datetime) -> ProjectSnapshot:
+        return self.snapshots([as_of])[0]
+
+    def snapshots(self, instants: List[datetime]) -> List[ProjectSnapshot]:
+        """Snapshots at many instants, e.g. every day of a sprint, in one pass."""
+        times = np.array([instant.timestamp() for instant in instants], dtype=float)
+        columns = zip(
+            self.scope.started_weight(times),
+            self.scope.open(times),
+            self.scope.open_weight(times),
+            self.wip.open(times),
+            self.wip.open_weight(times),
+        )
+        return [
+            ProjectSnapshot(
+                as_of=instant,
+                scope_points=float(scope),
+                open_cards=int(open_cards),
+                remaining_points=float(remaining),
+                wip_cards=int(wip_cards),
+                wip_points=float(wip),
+            )
+            for instant, (scope, open_cards, remaining, wip_cards, wip) in zip(instants, columns)
+        ]
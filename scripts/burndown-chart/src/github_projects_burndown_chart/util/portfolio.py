@@ -0,0 +1,121 @@
+import heapq
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from gh.project import Project
+from util.dates import date_range, end_of_day
+from util.groups import GroupSeries, grouped_points_by_date
+from util.intervals import CardIntervals
+
+
+def card_events(project: Project) -> List[Tuple[float, float]]:
+    """
+    The project's scope changes as (timestamp, points) events sorted by time:
+    +points when a card is created and -points when it is closed.
+    """
+    events = []
+    for card in project.cards:
+        if card.created:
+            events.append((card.created.timestamp(), card.points))
+        if card.closed:
+            events.append((card.closed.timestamp(), -card.points))
+    events.sort()
+    return events
+
+
+def _tagged(events: List[Tuple[float, float]], index: int) -> Iterator[Tuple[float, int, float]]:
+    for timestamp, points in events:
+        yield timestamp, index, points
+
+
+class PortfolioStats:
+    """
+    The combined burndown of several projects, e.g. one release tracked on
+    boards of different users, organizations and repositories.
+
+    Each project's events are sorted on their own and then streamed through a
+    k-way merge, so the sweep over the dates only ever holds one pending event
+    and one running total per project. Like `ProjectStats`, it shows the
+    projects as they were at `as_of`, or now if it is None.
+    """
+
+    def __init__(
+        self,
+        projects: List[Project],
+        start_date: datetime,
+        end_date: datetime,
+        as_of: Optional[datetime] = None,
+    ):
+        self.projects: List[Project] = projects
+        self.start_date: datetime = start_date
+        self.end_date: datetime = end_date
+        self.as_of: Optional[datetime] = as_of
+        self.__cutoff: datetime = as_of or datetime.now(timezone.utc)
+        self.__remaining: Optional[Dict[datetime, Optional[List[float]]]] = None
+
+    @property
+    def total_points(self) -> float:
+        """The points of all cards, or of the cards created by `as_of`."""
+        if self.as_of is None:
+            return sum(project.total_points for project in self.projects)
+        return sum(
+            CardIntervals(project.cards).snapshot(self.as_of).scope_points
+            for project in self.projects
+        )
+
+    @property
+    def cards(self):
+        return [card for project in self.projects for card in project.cards]
+
+    def __remaining_by_project(self) -> Dict[datetime, Optional[List[float]]]:
+        if self.__remaining is not None:
+            return self.__remaining
+
+        merged = heapq.merge(
+            *(_tagged(card_events(p), i) for i, p in enumerate(self.projects))
+        )
+        pending = next(merged, None)
+        running = [0.0] * len(self.projects)
+
+        self.__remaining = {}
+        for date in date_range(self.start_date, self.end_date):
+            day_end = min(end_of_day(date), self.__cutoff).timestamp()
+            while pending is not None and pending[0] <= day_end:
+                _, index, points = pending
+                running[index] += points
+                pending = next(merged, None)
+            # Dates after `as_of` are not plotted
+            self.__remaining[date] = list(running) if date <= self.__cutoff else None
+        return self.__remaining
+
+    def points_by_group(self, group_by: str) -> Dict[str, GroupSeries]:
+        """Remaining and closed points by date per group, across all projects."""
+        return grouped_points_by_date(
+            self.cards,
+            date_range(self.start_date, self.end_date),
+            group_by,
+            cutoff=self.__cutoff,
+        )
+
+    def remaining_points_by_date(self) -> Dict[datetime, Optional[float]]:
+        """The remaining points of all projects together."""
+        return {
+            date: sum(remaining) if remaining is not None else None
+            for date, remaining in self.__remaining_by_project().items()
+        }
+
+    def stacked_remaining_points_by_date(self) -> List[Dict[datetime, Optional[float]]]:
+        """
+        One series per project, stacked in project order: the n-th series is
+        the remaining points of the first n projects together.
+        """
+        stacked = [{} for _ in self.projects]
+        for date, remaining in self.__remaining_by_project().items():
+            total = 0.0
+            for index, points in enumerate(remaining or []):
+                total += points
+                stacked[index][date] = total
+            if remaining is None:
+                for series in stacked:
+                    series[date] = None
+        return stacked
@@ -1,63 +1,107 @@
-from datetime import datetime, timedelta
-from typing import Dict, Iterable, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
 from gh.project import *
-from util.dates import TODAY_UTC, date_range
+from util.dates import date_range, end_of_day
 from util.calculators import PointsCalculator, BurndownCalculator
+from util.groups import GroupSeries, grouped_points_by_date
+from util.intervals import CardIntervals, ProjectSnapshot
 
 
 class ProjectStats:
+    """
+    The burndown of a project as it looked at `as_of`, or now if it is None:
+    dates after it are not plotted, and events after it are ignored.
+    """
 
-    def __init__(self, project: Project, start_date: datetime, end_date: datetime):
+    def __init__(
+        self,
+        project: Project,
+        start_date: datetime,
+        end_date: datetime,
+        as_of: Optional[datetime] = None,
+        intervals: Optional[CardIntervals] = None,
+    ):
         self.start_date: datetime = start_date
         self.end_date: datetime = end_date
         self.project: Project = project
+        self.as_of: Optional[datetime] = as_of
+        self.__cutoff: datetime = as_of or datetime.now(timezone.utc)
+        self.__intervals: Optional[CardIntervals] = intervals
+
+    @property
+    def intervals(self) -> CardIntervals:
+        if self.__intervals is None:
+            self.__intervals = CardIntervals(self.project.cards)
+        return self.__intervals
+
+    def at(self, as_of: datetime) -> "ProjectStats":
+        """The same stats as of another instant, sharing the interval index."""
+        return ProjectStats(self.project, self.start_date, self.end_date, as_of, self.intervals)
+
+    def snapshot(self) -> ProjectSnapshot:
+        """The open scope, work in progress and remaining points at `as_of`."""
+        return self.intervals.snapshot(self.__cutoff)
+
+    def __day_ends(self, dates: Iterable[datetime]) -> List[datetime]:
+        # The end of each day, or `as_of` on the day it falls on
+        return [min(end_of_day(date), self.__cutoff) for date in dates]
 
     @property
-    def total_points(self) -> int:
-        return self.project.total_points
+    def total_points(self) -> float:
+        """The points of all cards, or of the cards created by `as_of`."""
+        if self.as_of is None:
+            return self.project.total_points
+        return self.snapshot().scope_points
 
-    def points_by_date(self, calculator: PointsCalculator) -> Dict[datetime, float]:
+    def points_by_date(self, calculator: PointsCalculator) -> Dict[datetime, Optional[float]]:
         """
-        Maps each date in the sprint to a cumulative point value.
+        Maps each date in the sprint to a cumulative point value. With `as_of`,
+        dates after it are None so the chart stops there.
         """
-        points = {}
         sprint_dates: Iterable[datetime] = date_range(self.start_date, self.end_date)
-        for date in sprint_dates:
-            # Get the issues completed before midnight on the given date.
-            end_of_day = date.replace(hour=23, minute=59, second=59, tzinfo=date.tzinfo)
-            points[date] = calculator.points_as_of(end_of_day)
+        plotted = [date for date in sprint_dates if self.as_of is None or date <= self.as_of]
+        # Get the issues completed before midnight on the given date.
+        ends_of_day = self.__day_ends(plotted)
+        points = dict.fromkeys(sprint_dates)
+        points.update(zip(plotted, calculator.points_by_dates(ends_of_day)))
         return points
 
     def remaining_points_by_date(self) -> Dict[datetime, Optional[float]]:
         """
         Calculates the actual burndown (Remaining = Scope - Completed).
-        Returns None for future dates so the chart stops at 'Today'.
+        Returns None for dates after `as_of` so the chart stops there.
         """
-        burndown_calc = BurndownCalculator(self.project.cards)
         sprint_dates = date_range(self.start_date, self.end_date)
+        plotted = [date for date in sprint_dates if date <= self.__cutoff]
+        times = np.array([d.timestamp() for d in self.__day_ends(plotted)], dtype=float)
+        remaining = self.intervals.remaining_points(times)
 
-        # Buffer today slightly to ensure today's progress is included
-        cutoff_date = TODAY_UTC.replace(hour=23, minute=59)
-
-        remaining_points = {}
-        for date in sprint_dates:
-            if date <= cutoff_date:
-                end_of_day = date.replace(
-                    hour=23, minute=59, second=59, tzinfo=date.tzinfo
-                )
-                remaining_points[date] = burndown_calc.points_as_of(end_of_day)
-            else:
-                # Future dates are not plotted
-                remaining_points[date] = None
-
+        remaining_points = dict.fromkeys(sprint_dates)
+        for date, points in zip(plotted, remaining):
+            remaining_points[date] = float(points)
         return remaining_points
 
+    def points_by_group(self, group_by: str) -> Dict[str, GroupSeries]:
+        """
+        Remaining and closed points by date for every label, assignee, status
+        or content type (see `util.groups.GROUP_KEYS`), in a single pass.
+        """
+        return grouped_points_by_date(
+            self.project.cards,
+            date_range(self.start_date, self.end_date),
+            group_by,
+            cutoff=self.__cutoff,
+        )
+
     def get_ideal_burndown(self) -> Dict[datetime, float]:
         """
         Calculates the 'Ideal' straight line from start to finish.
         """
         start_points = BurndownCalculator(self.project.cards).points_as_of(
-            self.start_date
+            min(self.start_date, self.__cutoff)
         )
         sprint_dates = date_range(self.start_date, self.end_date)
         total_days = len(sprint_dates) - 1